@@ -5,6 +5,7 @@ from .config_and_parser import (
     bucket_dataframe_lightnings,
     display_stats,
     export_as_csv,
+    export_as_parquet,
     export_general_stats,
     export_all_strikes,
     export_strike_stitchings,
@@ -17,6 +18,7 @@ __all__ = [
     "bucket_dataframe_lightnings",
     "display_stats",
     "export_as_csv",
+    "export_as_parquet",
     "export_general_stats",
     "export_all_strikes",
     "export_strike_stitchings",
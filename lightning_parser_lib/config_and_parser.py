@@ -10,13 +10,15 @@ This module processes LYLOUT data files by:
 
 import os
 import shutil
+import hashlib
+import copy
 import numpy as np
 import pandas as pd
-from .number_crunchers import database_parser, lightning_bucketer, lightning_plotters, toolbox
+from .number_crunchers import database_parser, lightning_bucketer, lightning_plotters, lightning_statistics, lightning_stitcher, toolbox
 from .number_crunchers.toolbox import tprint
 from .number_crunchers.lightning_visualization import XLMAParams,\
     create_strike_gif, export_strike_gif, create_strike_image, export_strike_image, export_stats, export_bulk_to_folder
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 from remote_functions import RemoteFunctions
 from deprecation import deprecated
 import datetime
@@ -36,6 +38,7 @@ class LightningConfig:
                  data_extension: str = ".dat",
                  cache_dir: str = "cache_dir",
                  csv_dir: str = "strikes_csv_files",
+                 parquet_dir: str = "strikes_parquet",
                  export_dir: str = "export",
                  strike_dir: str = "strikes",
                  strike_stitchings_dir: str = "strike_stitchings"):
@@ -49,6 +52,7 @@ class LightningConfig:
         self.cache_path = os.path.join(self.cache_dir, "os_cache.pkl")
 
         self.csv_dir = csv_dir
+        self.parquet_dir = parquet_dir
         self.export_dir = export_dir
         self.strike_dir = strike_dir
         self.strike_stitchings_dir = strike_stitchings_dir
@@ -159,7 +163,7 @@ def upload_lylout_file(config: LightningConfig, filename: str, contents: str) ->
     return True
     
 @rf.as_remote_no_queue()
-def limit_to_n_points(bucketed_strikes_indices: List[List[int]],
+def limit_to_n_points(bucketed_strikes_indices: lightning_bucketer.BucketedStrikes,
                       bucketed_lightning_correlations: List[List[Tuple[int, int]]],
                       min_points_threshold: int):
     
@@ -167,22 +171,19 @@ def limit_to_n_points(bucketed_strikes_indices: List[List[int]],
     Filters out buckets with fewer points than the specified threshold.
 
     Args:
-        bucketed_strikes_indices: List of indices for each lightning strike.
+        bucketed_strikes_indices: The lightning strikes (BucketedStrikes, or a list of index lists).
         bucketed_lightning_correlations: List of correlated indices per strike.
         min_points_threshold: Minimum number of points required.
 
     Returns:
         tuple: Filtered (bucketed_strikes_indices, bucketed_lightning_correlations).
     """
+    strikes = lightning_bucketer.BucketedStrikes.from_lists(bucketed_strikes_indices)
 
-    filtered_correlations = []
-    filtered_strikes = []
-    for i, correlation in enumerate(bucketed_lightning_correlations):
-        if len(correlation) > min_points_threshold:
-            filtered_correlations.append(correlation)
-            filtered_strikes.append(bucketed_strikes_indices[i])
+    keep = np.nonzero(strikes.sizes() >= min_points_threshold)[0]
 
-    return filtered_strikes, filtered_correlations
+    filtered_correlations = [bucketed_lightning_correlations[i] for i in keep]
+    return strikes.select(keep), filtered_correlations
 
 def _cache_and_parse(config: LightningConfig):
     """
@@ -208,7 +209,8 @@ def _cache_and_parse(config: LightningConfig):
                                                config.lightning_data_folder,
                                                config.data_extension,
                                                config.db_path,
-                                               config.cache_path)
+                                               config.cache_path,
+                                               num_cores=config.num_cores)
     # Display available headers from the database.
     tprint("Headers:", database_parser.get_headers(config.db_path))
 
@@ -238,14 +240,81 @@ def get_headers(config: LightningConfig) -> List[str]:
     _cache_and_parse(config) # Cache and parse
     return database_parser.get_headers(config.db_path)
 
+# Bump whenever the layout of the cached events DataFrame changes, so stale cache files are never reused
+_EVENTS_CACHE_VERSION = 3
+# Cached events files that have not been read for this many days are removed (like max_cache_life_days)
+EVENTS_CACHE_LIFE_DAYS = 30
+
+def _events_cache_files(config: LightningConfig) -> List[str]:
+    """
+    Paths of all cached events files (see _events_cache_path) in the cache directory.
+    """
+    if not os.path.isdir(config.cache_dir):
+        return []
+    return [os.path.join(config.cache_dir, name) for name in os.listdir(config.cache_dir)
+            if name.startswith("events_") and name.endswith(".parquet")]
+
+def _evict_events_cache(config: LightningConfig):
+    """
+    Removes the cached events files that were not used for EVENTS_CACHE_LIFE_DAYS. Every read refreshes
+    the modification time of its file, and every change to the filters or the data files creates a new
+    file, so this bounds the copies of the events that pile up on disk.
+    """
+    expiry = datetime.datetime.now().timestamp() - EVENTS_CACHE_LIFE_DAYS * 24 * 60 * 60
+    for path in _events_cache_files(config):
+        try:
+            if os.path.getmtime(path) < expiry:
+                tprint("Cached events expired. Removing", path)
+                os.remove(path)
+        except FileNotFoundError:
+            pass  # Removed by another process
+
+def _events_cache_path(filters, config: LightningConfig) -> str:
+    """
+    Computes the path of the cached events file for the given filters and the current LYLOUT files.
+
+    The key is a hash of the sorted filters together with the path and modification time of every data
+    file, so any added, removed, or modified LYLOUT file results in a different key.
+
+    Args:
+        filters: Filter criteria for the query.
+        config: An instance of LightningConfig.
+
+    Returns:
+        str: Path to the parquet file that holds (or will hold) the filtered events.
+    """
+    normalized_filters = sorted(repr(filt) for filt in database_parser._normalize_filters(filters))
+    files = sorted(database_parser.get_dat_files_paths(config.lightning_data_folder, config.data_extension))
+
+    hasher = hashlib.blake2b(f"v{_EVENTS_CACHE_VERSION}:{normalized_filters}".encode(), digest_size=16)
+    for path in files:
+        hasher.update(f"{path}:{os.stat(path).st_mtime_ns}".encode())
+    return os.path.join(config.cache_dir, f"events_{hasher.hexdigest()}.parquet")
+
+def _query_events(filters, config: LightningConfig) -> pd.DataFrame:
+    """
+    Queries the events of all LYLOUT files in the database from their memory-mapped Arrow store,
+    falling back to the SQLite database for filters (or files) the store cannot serve.
+    """
+    events = database_parser.query_events_from_arrow_store(filters, DB_PATH=config.db_path)
+    if events is None:
+        events = database_parser.query_events_as_dataframe(filters, config.db_path)
+    return events
+
 @rf.as_remote()
-def get_events(filters, config: LightningConfig) -> pd.DataFrame:
+def get_events(filters, config: LightningConfig, columns: Optional[List[str]] = None) -> pd.DataFrame:
     """
-    Retrieves event data from the SQLite database based on the provided filters.
+    Retrieves event data from the database (through its Arrow store) based on the provided filters.
+
+    Results are memoized as a parquet file in the cache directory, keyed by the filters and the
+    modification times of the LYLOUT files. When nothing changed, the database is not touched at all
+    and the events are memory-mapped back from the parquet file.
 
     Args:
         filters: Filter criteria for the query.
         config: An instance of LightningConfig.
+        columns: Optional list of columns to return. Defaults to all columns. Restricting this
+                 (e.g. leaving out 'mask_int' and 'file_name') makes cached reads cheaper.
 
     Returns:
         pd.DataFrame: DataFrame containing event data.
@@ -253,16 +322,34 @@ def get_events(filters, config: LightningConfig) -> pd.DataFrame:
     if server_sided_config_override:
         config = server_sided_config_override
 
-    tprint("Obtaining datapoints from database. This may take some time...")
-    _cache_and_parse(config) # Cache and parse
+    config.create_additional_inits() # Ensure the cache directory exists
+    cache_path = _events_cache_path(filters, config)
+
+    if os.path.exists(cache_path):
+        tprint("Obtaining datapoints from cache")
+        events = pd.read_parquet(cache_path, engine="pyarrow", memory_map=True, columns=columns)
+        os.utime(cache_path)  # Mark as recently used (see _evict_events_cache)
+    else:
+        tprint("Obtaining datapoints from database. This may take some time...")
+        _cache_and_parse(config) # Cache and parse
+
+        events = _query_events(filters, config)
+
+        # Write to a temporary file first so a concurrent reader never sees a partial file
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        events.to_parquet(temp_path, engine="pyarrow", index=False, compression="zstd", use_dictionary=True)
+        os.replace(temp_path, cache_path)
+        _evict_events_cache(config)
+
+        if columns is not None:
+            events = events[columns]
 
-    events = database_parser.query_events_as_dataframe(filters, config.db_path)
     if events.empty:
         tprint("Filters too restrained")
     return events
 
 @rf.as_remote()
-def get_events_and_bucket_dataframe_lightnings(filters, config: LightningConfig, params) -> tuple[pd.DataFrame, List[List[int]], List[Tuple[int, int]]]:
+def get_events_and_bucket_dataframe_lightnings(filters, config: LightningConfig, params) -> tuple[pd.DataFrame, lightning_bucketer.BucketedStrikes, List[List[Tuple[int, int]]]]:
     """
     Retrieves event data and buckets lightning strikes from the events.
 
@@ -278,15 +365,15 @@ def get_events_and_bucket_dataframe_lightnings(filters, config: LightningConfig,
     Returns:
       tuple:
         - pd.DataFrame: DataFrame of event data.
-        - List[List[int]]: Buckets of indices representing lightning strikes.
-        - List[Tuple[int, int]]: Buckets of correlated indices for strikes.
+        - BucketedStrikes: Buckets of indices representing lightning strikes.
+        - List[List[Tuple[int, int]]]: Buckets of correlated indices for strikes.
     """
     if server_sided_config_override:
         config = server_sided_config_override
 
     _cache_and_parse(config) # Cache and parse    
 
-    events = database_parser.query_events_as_dataframe(filters, config.db_path)
+    events = _query_events(filters, config)
     
     bucketed_strikes_indices, bucketed_lightning_correlations = None, None
     if events.empty:
@@ -305,14 +392,19 @@ def _bucket_dataframe_lightnings(events, config: LightningConfig, params):
     lightning_bucketer.NUM_CORES = config.num_cores
     lightning_bucketer.MAX_CHUNK_SIZE = 50000
 
-    bucketed_strikes_indices, bucketed_lightning_correlations = lightning_bucketer.bucket_dataframe_lightnings(events, params)
-    if not bucketed_strikes_indices:
+    # Only the numeric time/position columns are needed for bucketing, so avoid hauling the full
+    # DataFrame (with its string columns) through the bucketer and its worker processes.
+    events_core = lightning_stitcher.events_to_xyzt(events)
+
+    offsets, indices, bucketed_lightning_correlations = lightning_bucketer.bucket_dataframe_lightnings(events_core, params)
+    if offsets is None or len(offsets) <= 1:
         raise ArithmeticError("Stitching parameters too restrained.")
+    bucketed_strikes_indices = lightning_bucketer.BucketedStrikes(offsets, indices)
     tprint("Created buckets of nodes that resemble a lightning strike")
     return bucketed_strikes_indices, bucketed_lightning_correlations
 
 @rf.as_remote()
-def bucket_dataframe_lightnings(events: pd.DataFrame, config: LightningConfig, params) -> tuple[List[List[int]], List[Tuple[int, int]]]:
+def bucket_dataframe_lightnings(events: pd.DataFrame, config: LightningConfig, params) -> tuple[lightning_bucketer.BucketedStrikes, List[List[Tuple[int, int]]]]:
     """
     Buckets events into lightning strikes based on provided parameters, using caching and multiprocessing.
 
@@ -322,7 +414,8 @@ def bucket_dataframe_lightnings(events: pd.DataFrame, config: LightningConfig, p
         params: Parameters for bucketing lightning strikes.
 
     Returns:
-        tuple: (bucketed_strikes_indices, bucketed_lightning_correlations)
+        tuple: (bucketed_strikes_indices, bucketed_lightning_correlations), where bucketed_strikes_indices
+               is a BucketedStrikes (CSR offsets/indices) that can be indexed like a list of index lists.
     """
     if server_sided_config_override:
         config = server_sided_config_override
@@ -340,22 +433,16 @@ def display_stats(events: pd.DataFrame, bucketed_strikes_indices: list[list[int]
         events: DataFrame containing event data.
         bucketed_strikes_indices: Buckets of indices for lightning strikes.
     """
-    total_points_passed = 0
-    strike_durations = []
-
     if len(bucketed_strikes_indices) == 0:
         raise ValueError("The list 'bucketed_strikes_indices' is empty")
 
-    for strike in bucketed_strikes_indices:
-        start_time_unix = events.iloc[strike[0]]["time_unix"]
-        end_time_unix = events.iloc[strike[-1]]["time_unix"]
-        total_points_passed += len(strike)
-        strike_durations.append(end_time_unix - start_time_unix)
+    strike_stats = lightning_statistics.compute_strike_stats(events, bucketed_strikes_indices)
+    total_points_passed = int(strike_stats["num_pts"].sum())
 
     total_pts = len(events)
     pct = (total_points_passed / total_pts) * 100
     tprint(f"Passed points: {total_points_passed} out of {total_pts} points ({pct:.2f}%)")
-    avg_time = np.average(strike_durations)
+    avg_time = np.average(strike_stats["duration"])
     tprint(f"Average lightning strike time: {avg_time:.2f} seconds")
     avg_bucket_size = int(total_pts / len(bucketed_strikes_indices))
     tprint(f"Average bucket size: {avg_bucket_size} points")
@@ -384,7 +471,7 @@ def delete_sql_database(config: LightningConfig):
 @rf.as_remote()
 def delete_pkl_cache(config: LightningConfig):
     """
-    This function deletes the pickled cache
+    This function deletes the pickled cache, and the cached events files
     """
     if server_sided_config_override:
         config = server_sided_config_override
@@ -392,6 +479,9 @@ def delete_pkl_cache(config: LightningConfig):
     lightning_bucketer.RESULT_CACHE_FILE = os.path.join(config.cache_dir, "result_cache.pkl")
     lightning_bucketer.delete_result_cache()
 
+    for path in _events_cache_files(config):
+        os.remove(path)
+
 def export_as_csv(bucketed_strikes_indices: list[list[int]], events: pd.DataFrame, config: LightningConfig):
     """
     Exports the lightning strikes data as CSV files.
@@ -408,9 +498,37 @@ def export_as_csv(bucketed_strikes_indices: list[list[int]], events: pd.DataFram
     if os.path.exists(config.csv_dir):
         shutil.rmtree(config.csv_dir)
     os.makedirs(config.csv_dir, exist_ok=True)
-    lightning_bucketer.export_as_csv(bucketed_strikes_indices, events, output_dir=config.csv_dir)
+    lightning_bucketer.export_as_csv(bucketed_strikes_indices, events, output_dir=config.csv_dir, DB_PATH=config.db_path)
     tprint("Finished exporting as CSV")
 
+def export_as_parquet(bucketed_strikes_indices: list[list[int]], events: pd.DataFrame, config: LightningConfig):
+    """
+    Exports the lightning strikes data as a single Parquet dataset, partitioned by strike_id.
+
+    Args:
+        bucketed_strikes_indices: Buckets of indices for lightning strikes.
+        events: DataFrame containing event data.
+        config: An instance of LightningConfig.
+    """
+    if server_sided_config_override:
+        config = server_sided_config_override
+
+    tprint("Exporting Parquet data")
+    if os.path.exists(config.parquet_dir):
+        shutil.rmtree(config.parquet_dir)
+    lightning_bucketer.export_as_parquet(bucketed_strikes_indices, events, output_dir=config.parquet_dir, DB_PATH=config.db_path)
+    tprint("Finished exporting as Parquet")
+
+def _with_shapefile_cache(xlma_params: XLMAParams, config: LightningConfig) -> XLMAParams:
+    """
+    Returns the XLMAParams with shapefile_cache_dir defaulted to a folder in the cache directory.
+    """
+    if getattr(xlma_params, "shapefile_cache_dir", None) is not None:
+        return xlma_params
+    xlma_params = copy.copy(xlma_params)
+    xlma_params.shapefile_cache_dir = os.path.join(config.cache_dir, "shapefiles")
+    return xlma_params
+
 def export_general_stats(bucketed_strikes_indices: list[list[int]],
                          bucketed_lightning_correlations: list[list[int, int]],
                          events: pd.DataFrame,
@@ -429,6 +547,8 @@ def export_general_stats(bucketed_strikes_indices: list[list[int]],
     if server_sided_config_override:
         config = server_sided_config_override
 
+    xlma_params = _with_shapefile_cache(xlma_params, config)
+
     if os.path.exists(config.export_dir):
         shutil.rmtree(config.export_dir)
     os.makedirs(config.export_dir, exist_ok=True)
@@ -485,6 +605,8 @@ def export_all_strikes(bucketed_strikes_indices: list[list[int]],
     if server_sided_config_override:
         config = server_sided_config_override
 
+    xlma_params = _with_shapefile_cache(xlma_params, config)
+
     if os.path.exists(config.strike_dir):
         shutil.rmtree(config.strike_dir)
     os.makedirs(config.strike_dir, exist_ok=True)
@@ -517,6 +639,8 @@ def export_strike_stitchings(bucketed_lightning_correlations: list[list[int, int
     if server_sided_config_override:
         config = server_sided_config_override
 
+    xlma_params = _with_shapefile_cache(xlma_params, config)
+
     tprint("Plotting all strike stitchings")
     if os.path.exists(config.strike_stitchings_dir):
         shutil.rmtree(config.strike_stitchings_dir)
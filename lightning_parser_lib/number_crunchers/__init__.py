@@ -2,16 +2,23 @@ from .database_parser import (
     get_dat_files_paths,
     DEFAULT_STATION_MASK_ORDER,
     transformer,
+    with_power,
+    stations_for,
+    with_stations,
+    get_station_mask_orders,
     parse_lylout,
     cache_and_parse_database,
     query_events,
     query_events_as_dataframe,
+    query_events_from_arrow_store,
     get_headers,
     remove_from_database_with_file_name,
 )
 from .lightning_bucketer import (
     bucket_dataframe_lightnings,
     export_as_csv,
+    export_as_parquet,
+    BucketedStrikes,
     NUM_CORES,
     MAX_CHUNK_SIZE,
     RESULT_CACHE_FILE,
@@ -45,6 +52,7 @@ from .toolbox import (
     save_cache_quick,
     is_cached,
     cpu_pct_to_cores,
+    pin_worker_threads,
     is_mostly_text,
     find_county_file,
     find_shp,
@@ -72,6 +80,7 @@ from .lightning_visualization import (
 )
 
 from .lightning_statistics import (
+    compute_strike_stats,
     generate_prestats,
     compute_detailed_stats,
     print_stats
@@ -82,15 +91,22 @@ __all__ = [
     "get_dat_files_paths",
     "DEFAULT_STATION_MASK_ORDER",
     "transformer",
+    "with_power",
+    "stations_for",
+    "with_stations",
+    "get_station_mask_orders",
     "parse_lylout",
     "cache_and_parse_database",
     "query_events",
     "query_events_as_dataframe",
+    "query_events_from_arrow_store",
     "get_headers",
     "remove_from_database_with_file_name",
     # lightning_bucketer
     "bucket_dataframe_lightnings",
     "export_as_csv",
+    "export_as_parquet",
+    "BucketedStrikes",
     "NUM_CORES",
     "MAX_CHUNK_SIZE",
     "RESULT_CACHE_FILE",
@@ -120,6 +136,7 @@ __all__ = [
     "save_cache_quick",
     "is_cached",
     "cpu_pct_to_cores",
+    "pin_worker_threads",
     "is_mostly_text",
     "find_county_file",
     "find_shp",
@@ -143,6 +160,7 @@ __all__ = [
     "export_stats",
     "export_bulk_to_folder",
     # lightning_statistics
+    "compute_strike_stats",
     "generate_prestats",
     "compute_detailed_stats",
     "print_stats"
@@ -0,0 +1,37 @@
+"""
+Compile the lightning kernels ahead of time with numba.pycc.
+
+The compiled extension module (lightning_kernels_aot) is written next to lightning_kernels.py, which
+picks it up on import, so a fresh environment pays no JIT compilation at all. Without it, the kernels
+are JIT compiled (and cached on disk) as before.
+
+Usage:
+    python -m lightning_parser_lib.number_crunchers.build_kernels
+
+Rebuild after changing lightning_kernels.py, or delete the compiled module to go back to the parallel
+JIT kernels. A C compiler is required.
+"""
+import os
+from numba.pycc import CC
+from . import lightning_kernels
+
+AOT_MODULE_NAME = "lightning_kernels_aot"
+
+
+def build_kernels(output_dir: str = os.path.dirname(os.path.abspath(__file__))) -> None:
+    """
+    Compile lightning_kernels.AOT_SIGNATURES into the AOT_MODULE_NAME extension module.
+
+    Parameters:
+      output_dir (str): Directory to write the module to. Defaults to the package directory.
+    """
+    cc = CC(AOT_MODULE_NAME)
+    cc.output_dir = output_dir
+    cc.verbose = True
+    for name, signature in lightning_kernels.AOT_SIGNATURES.items():
+        cc.export(name, signature)(lightning_kernels.JIT_KERNELS[name].py_func)
+    cc.compile()
+
+
+if __name__ == "__main__":
+    build_kernels()
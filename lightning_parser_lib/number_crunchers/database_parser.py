@@ -1,14 +1,19 @@
 import os
 import datetime
+import functools
 import sqlite3
+import shutil
+import concurrent.futures
 from pyproj import Transformer
+import numpy as np
 import pandas as pd
-import sys
-import traceback
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
 from .toolbox import tprint
 from . import logger 
 from . import toolbox
-from typing import List, Tuple, Any
+from typing import List, Tuple, Any, Optional
 
 def get_dat_files_paths(lightning_data_folder, data_extension):
     """
@@ -32,23 +37,94 @@ def get_dat_files_paths(lightning_data_folder, data_extension):
 # Default station mask order (each character represents a station in order)
 DEFAULT_STATION_MASK_ORDER = "NMLKJIHGFEDC3A"
 
+# Explicit dtypes of the 'events' columns, so pandas can skip type inference when loading query results.
+# 'file_name' repeats for every event of a file, so it is loaded as a categorical.
+EVENTS_DTYPES = {
+    "id": "int64",
+    "time_unix": "float64",
+    "lat": "float64",
+    "lon": "float64",
+    "alt": "float64",
+    "reduced_chi2": "float64",
+    "num_stations": "int64",
+    "power_db": "float64",
+    "mask_int": "uint32",
+    "x": "float64",
+    "y": "float64",
+    "z": "float64",
+    "file_name": "category",
+}
+
+# Version of the 'events' table layout, stored as the database's user_version. Databases with another
+# version are rebuilt from the LYLOUT files (see _migrate_database).
+SCHEMA_VERSION = 3
+
+# Number of events converted to Python values and inserted per executemany call during ingest
+INSERT_BATCH_SIZE = 10_000
+
+# Directory (next to the database) holding one Arrow IPC file with the events of every LYLOUT file
+ARROW_STORE_DIR = "events_arrow"
+
+# SQL comparison operators that the Arrow store can evaluate, and their pyarrow.compute equivalents
+_ARROW_COMPARISONS = {
+    "=": pc.equal,
+    "==": pc.equal,
+    "!=": pc.not_equal,
+    "<>": pc.not_equal,
+    "<": pc.less,
+    "<=": pc.less_equal,
+    ">": pc.greater,
+    ">=": pc.greater_equal,
+}
+
 # Initialize a transformer to convert from WGS84 (lat,lon,alt in EPSG:4979) to ECEF (EPSG:4978)
 transformer = Transformer.from_crs("EPSG:4979", "EPSG:4978", always_xy=True)
 
 
-def _decode_station_mask(mask_str, station_mask_order=DEFAULT_STATION_MASK_ORDER):
+def with_power(events: pd.DataFrame) -> pd.DataFrame:
     """
-    Decode a hexadecimal station mask string into a comma-separated list of station names.
+    Return a copy of the events with the linear 'power' column (watts) computed from 'power_db' (dBW).
+
+    'power' is not stored in the database; call this only where linear watts are actually needed.
+    The conversion 10^(power_db / 10) runs through numexpr when it is installed, and numpy otherwise.
 
     Parameters:
-      mask_str (str): The hexadecimal mask string representing active stations.
+      events (pd.DataFrame): DataFrame containing a 'power_db' column.
+
+    Returns:
+      pd.DataFrame: A copy of the events with 'power' inserted right after 'power_db'.
+                    The events are returned unchanged if they already have a 'power' column.
+    """
+    if "power" in events.columns:
+        return events
+
+    power_db = events["power_db"].to_numpy(dtype=np.float64)
+    try:
+        import numexpr
+        power = numexpr.evaluate("10 ** (pdb / 10)", local_dict={"pdb": power_db})
+    except ImportError:
+        power = 10 ** (power_db / 10)  # Conversion from dBW to linear watts
+
+    events = events.copy()
+    events.insert(events.columns.get_loc("power_db") + 1, "power", power)
+    return events
+
+
+@functools.lru_cache(maxsize=None)
+def stations_for(mask_int: int, station_mask_order: str = DEFAULT_STATION_MASK_ORDER) -> str:
+    """
+    Decode a station bitmask into a comma-separated list of station names.
+
+    There are only a handful of distinct masks, so the decoded names are memoized.
+
+    Parameters:
+      mask_int (int): The bitmask of active stations (the 'mask_int' column).
       station_mask_order (str, optional): Order in which stations are represented.
                                           Defaults to DEFAULT_STATION_MASK_ORDER.
 
     Returns:
       str: A comma-separated list (all as a single string, explicitly) of station names corresponding to active bits in the mask.
     """
-    mask_int = int(mask_str.strip(), 16)
     stations = []
     for i, station in enumerate(station_mask_order):
         if mask_int & (1 << i):
@@ -56,31 +132,108 @@ def _decode_station_mask(mask_str, station_mask_order=DEFAULT_STATION_MASK_ORDER
     return ",".join(stations)
 
 
-def _add_to_database(cursor, event):
+def get_station_mask_orders(DB_PATH: str = "lylout_db.db") -> dict:
     """
-    Insert an event record into the 'events' table in the database.
+    Retrieve the station mask order of every parsed LYLOUT file.
+
+    Parameters:
+      DB_PATH (str): Path to the SQLite database file. Defaults to "lylout_db.db".
+
+    Returns:
+      dict[str, str]: The station mask order, keyed by file name.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute("SELECT file_name, station_mask_order FROM station_mask_orders").fetchall()
+    finally:
+        conn.close()
+    return dict(rows)
+
+
+def with_stations(events: pd.DataFrame, DB_PATH: str = "lylout_db.db") -> pd.DataFrame:
+    """
+    Return a copy of the events with the human-readable 'mask' (hexadecimal, as written in the LYLOUT
+    files) and 'stations' columns decoded from 'mask_int'.
+
+    Neither is stored in the database; call this only where station names are actually needed.
+    Every mask is decoded with the station mask order of the file it came from.
+
+    Parameters:
+      events (pd.DataFrame): DataFrame containing 'mask_int' and 'file_name' columns.
+      DB_PATH (str): Path to the SQLite database file. Defaults to "lylout_db.db".
+
+    Returns:
+      pd.DataFrame: A copy of the events with 'mask' and 'stations' inserted right after 'mask_int'.
+                    The events are returned unchanged if they already have a 'stations' column.
+    """
+    if "stations" in events.columns:
+        return events
+
+    station_mask_orders = get_station_mask_orders(DB_PATH)
+
+    # Decode every distinct (file, mask) pair once
+    codes, pairs = pd.MultiIndex.from_arrays([events["file_name"].astype(str), events["mask_int"]]).factorize()
+    masks = np.array([f"0x{int(mask_int):04x}" for _, mask_int in pairs], dtype=object)
+    stations = np.array([
+        stations_for(int(mask_int), station_mask_orders.get(file_name, DEFAULT_STATION_MASK_ORDER))
+        for file_name, mask_int in pairs
+    ], dtype=object)
+
+    events = events.copy()
+    position = events.columns.get_loc("mask_int") + 1
+    events.insert(position, "mask", masks[codes])
+    events.insert(position + 1, "stations", stations[codes])
+    return events
+
+
+def _popcount(masks: np.ndarray) -> np.ndarray:
+    """
+    Number of set bits of every uint32 in masks, as int64.
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks).astype(np.int64)
+    # numpy < 2.0
+    return np.unpackbits(masks.astype(np.uint32).view(np.uint8)).reshape(-1, 32).sum(axis=1).astype(np.int64)
+
+
+def _add_to_database(cursor, events):
+    """
+    Insert event records into the 'events' table in the database.
 
     Parameters:
       cursor (sqlite3.Cursor): Database cursor used to execute SQL statements.
-      event (tuple): A tuple containing event data in the following order:
-                     (time_unix, lat, lon, alt, reduced_chi2, num_stations, power_db, power, mask, stations, x, y, z, file_name)
+      events (Iterable[tuple]): Tuples containing event data in the following order:
+                     (time_unix, lat, lon, alt, reduced_chi2, num_stations, power_db, mask_int, x, y, z, file_name)
 
     Returns:
       None
     """
-    cursor.execute(
+    cursor.executemany(
         """
         INSERT INTO events (
-            time_unix, lat, lon, alt, reduced_chi2, num_stations, power_db, power, mask, stations, x, y, z, file_name
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            time_unix, lat, lon, alt, reduced_chi2, num_stations, power_db, mask_int, x, y, z, file_name
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """,
-        event,
+        events,
     )
 
 
+def _schema_version(conn: sqlite3.Connection) -> Optional[int]:
+    """
+    The SCHEMA_VERSION the 'events' table was built with, or None if the database has no 'events' table.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events'").fetchone() is None:
+        return None
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
 def _create_database_if_not_exist(DB_PATH: str = "lylout_db.db"):
     """
-    Create the SQLite database and 'events' table if they do not exist.
+    Create the SQLite database and 'events' table if they do not exist. A newly created 'events'
+    table is stamped with SCHEMA_VERSION; an existing one keeps the version it was built with.
+
+    The connection is tuned for bulk ingest: WAL journaling without a sync on every commit, temporary
+    tables and indices in memory, a memory-mapped database file and a 256 MiB page cache.
 
     Parameters:
       DB_PATH (str): Path to the SQLite database file. Defaults to "lylout_db.db".
@@ -89,7 +242,18 @@ def _create_database_if_not_exist(DB_PATH: str = "lylout_db.db"):
       sqlite3.Connection: Connection object to the SQLite database.
     """
     conn = sqlite3.connect(DB_PATH)
+    conn.executescript(
+        """
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA mmap_size=30000000000;
+        PRAGMA cache_size=-262144;
+    """
+    )
     cursor = conn.cursor()
+    if _schema_version(conn) is None:
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS events (
@@ -101,9 +265,7 @@ def _create_database_if_not_exist(DB_PATH: str = "lylout_db.db"):
             reduced_chi2 FLOAT,
             num_stations INTEGER,
             power_db FLOAT,
-            power FLOAT,
-            mask TEXT,
-            stations TEXT,
+            mask_int INTEGER,
             x FLOAT,
             y FLOAT,
             z FLOAT,
@@ -111,9 +273,22 @@ def _create_database_if_not_exist(DB_PATH: str = "lylout_db.db"):
         )
     """
     )
+    # The station mask order of every LYLOUT file, to decode 'mask_int' (see with_stations)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS station_mask_orders (
+            file_name TEXT PRIMARY KEY,
+            station_mask_order TEXT
+        )
+    """
+    )
 
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_time_unix ON events(time_unix)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_num_stations ON events(num_stations)")
+    # Replacing, removing and exporting the events of one file select them by file name
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_file_name ON events(file_name)")
+    # Composite index so the typical time/altitude/power filter resolves as a single B-tree range scan
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_time_alt ON events(time_unix, alt, power_db)")
     conn.commit()
     return conn
 
@@ -148,33 +323,29 @@ def _executesql(query, params=None, DB_PATH="lylout_db.db", fetch=True):
         conn.close()
 
 
-def _build_where_clause(filters):
+def _normalize_filters(filters) -> List[Tuple[str, str, Any]]:
     """
-    Construct a SQL WHERE clause from provided filter conditions.
+    Normalize filter conditions into a list of (column, operator, value) tuples.
 
     Filters can be specified as a dictionary or a list. For a dictionary, each key-value pair
     represents a column and its required value using equality. For a list, each element must be
     either a tuple (column, operator, value) or a dictionary with keys "column", "operator", and "value".
 
     Parameters:
-      filters (dict or list): Filter conditions for constructing the WHERE clause.
+      filters (dict or list): Filter conditions to normalize.
 
     Returns:
-      tuple: A tuple containing the WHERE clause (as a string) and a list of parameters.
+      List[Tuple[str, str, Any]]: The filters as (column, operator, value) tuples, in their original order.
     """
-    conditions = []
-    params = []
+    normalized = []
 
     if isinstance(filters, dict):
         for col, val in filters.items():
-            conditions.append(f"{col} = ?")
-            params.append(val)
+            normalized.append((col, "=", val))
     elif isinstance(filters, list):
         for filt in filters:
             if isinstance(filt, tuple) and len(filt) == 3:
-                col, op, val = filt
-                conditions.append(f"{col} {op} ?")
-                params.append(val)
+                normalized.append(filt)
             elif isinstance(filt, dict):
                 col = filt.get("column")
                 op = filt.get("operator", "=")
@@ -183,8 +354,7 @@ def _build_where_clause(filters):
                     raise ValueError(
                         "Each filter dict must have 'column' and 'value' keys."
                     )
-                conditions.append(f"{col} {op} ?")
-                params.append(val)
+                normalized.append((col, op, val))
             else:
                 raise ValueError(
                     f"Filters must be tuples (column, operator, value) or dicts. {filt}, {type(filt)}"
@@ -192,6 +362,45 @@ def _build_where_clause(filters):
     else:
         raise ValueError("Filters must be either a dict or a list.")
 
+    return normalized
+
+
+def _build_where_clause(filters):
+    """
+    Construct a SQL WHERE clause from provided filter conditions.
+
+    Filters can be specified as a dictionary or a list. For a dictionary, each key-value pair
+    represents a column and its required value using equality. For a list, each element must be
+    either a tuple (column, operator, value) or a dictionary with keys "column", "operator", and "value".
+
+    Filters are grouped by column, and a column bounded by exactly one ">=" and one "<=" condition
+    is merged into a single "BETWEEN ? AND ?" predicate so SQLite can resolve it as one index range scan.
+
+    Parameters:
+      filters (dict or list): Filter conditions for constructing the WHERE clause.
+
+    Returns:
+      tuple: A tuple containing the WHERE clause (as a string) and a list of parameters.
+    """
+    grouped = {}
+    for col, op, val in _normalize_filters(filters):
+        grouped.setdefault(col, []).append((op.strip(), val))
+
+    conditions = []
+    params = []
+    for col, col_filters in grouped.items():
+        ops = [op for op, _ in col_filters]
+        if len(col_filters) == 2 and sorted(ops) == ["<=", ">="]:
+            lower = col_filters[ops.index(">=")][1]
+            upper = col_filters[ops.index("<=")][1]
+            conditions.append(f"{col} BETWEEN ? AND ?")
+            params += [lower, upper]
+            continue
+
+        for op, val in col_filters:
+            conditions.append(f"{col} {op} ?")
+            params.append(val)
+
     clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
     return clause, params
 
@@ -210,10 +419,15 @@ def remove_from_database_with_file_name(file_name: str, lightning_data_folder: s
     cursor = conn.cursor()
     cursor.execute("DELETE FROM events WHERE file_name = ?", (file_name,))
     deleted_count = cursor.rowcount
+    cursor.execute("DELETE FROM station_mask_orders WHERE file_name = ?", (file_name,))
     conn.commit()
     conn.close()
     if os.path.exists(CACHE_PATH):
         os.remove(CACHE_PATH)
+
+    arrow_store_path = _arrow_store_path(DB_PATH, file_name)
+    if os.path.exists(arrow_store_path):
+        os.remove(arrow_store_path)
     
     try:
         full_log_path = os.path.join(lightning_data_folder, file_name)
@@ -267,6 +481,9 @@ def query_events_as_dataframe(filters: List[Tuple[str, str, Any]], DB_PATH="lylo
     """
     Query the 'events' table and return the results as a pandas DataFrame.
 
+    All filters are compiled into one parameterized SELECT statement (see _build_where_clause), so the
+    filtering happens inside SQLite and only matching rows are materialized into the DataFrame.
+
     Parameters:
       filters (dict or list): Filter conditions to apply for querying.
       DB_PATH (str): Path to the SQLite database file. Defaults to "lylout_db.db".
@@ -274,33 +491,112 @@ def query_events_as_dataframe(filters: List[Tuple[str, str, Any]], DB_PATH="lylo
     Returns:
       pandas.DataFrame: DataFrame containing the query results.
     """
-    time_filters = []
-    non_time_filters = []
-    for filt in filters:
-        if filt[0] == 'time_unix':
-            time_filters.append(filt)
-        else:
-            non_time_filters.append(filt)
-
-    start_time = None
-    end_time = None
-    for filt in time_filters:
-        op = filt[1]
-        val = filt[2]
-        if op in ['>=', '>']:
-            if start_time is None or val < start_time:
-                start_time = val
-        elif op in ['<=', '<']:
-            if end_time is None or val > end_time:
-                end_time = val
-    if start_time and end_time:
-        results = query_events_by_time(start_time, end_time, filters, DB_PATH)  # Get results as a list of sqlite3.Row
-    else:
-        results = query_events(filters, DB_PATH)  # Get results as a list of sqlite3.Row
-    df = pd.DataFrame(results, columns=get_headers(DB_PATH))  # Convert to DataFrame
+    where_clause, params = _build_where_clause(filters)
+    # Ties in time are ordered by id, so the rows come back in the same order as from the Arrow store
+    query = f"SELECT * FROM events {where_clause} ORDER BY time_unix ASC, id ASC"
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        df = pd.read_sql_query(query, conn, params=params, dtype=_events_dtypes(DB_PATH))
+    finally:
+        conn.close()
     return df
 
 
+def _events_dtypes(DB_PATH="lylout_db.db") -> dict:
+    """
+    The EVENTS_DTYPES of the columns that exist in the 'events' table.
+    """
+    headers = get_headers(DB_PATH)
+    return {col: dtype for col, dtype in EVENTS_DTYPES.items() if col in headers}
+
+
+def _arrow_store_path(DB_PATH: str, file_name: str) -> str:
+    """
+    Path of the Arrow IPC file holding the events of one LYLOUT file (see query_events_from_arrow_store).
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), ARROW_STORE_DIR, f"{file_name}.arrow")
+
+
+def _write_arrow_store(conn: sqlite3.Connection, DB_PATH: str, file_name: str, where_clause: str, params: list):
+    """
+    Copy the events of one LYLOUT file from the database into its Arrow IPC file.
+
+    The rows are read back from SQLite (rather than taken from the parsed file) so the store holds
+    exactly what the database holds, including the 'id' column. The file is written uncompressed, so
+    reads can memory-map it without decompressing, and renamed into place once complete.
+
+    Parameters:
+      conn (sqlite3.Connection): Connection to the database.
+      DB_PATH (str): Path to the SQLite database file.
+      file_name (str): The name of the LYLOUT file.
+      where_clause (str): WHERE clause selecting the events of the file.
+      params (list): Parameters of the WHERE clause.
+    """
+    df = pd.read_sql_query(f"SELECT * FROM events {where_clause} ORDER BY id", conn, params=params, dtype=_events_dtypes(DB_PATH))
+
+    path = _arrow_store_path(DB_PATH, file_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), temp_path, compression="uncompressed")
+    os.replace(temp_path, path)
+
+
+def query_events_from_arrow_store(filters, file_names: Optional[List[str]] = None, DB_PATH="lylout_db.db") -> Optional[pd.DataFrame]:
+    """
+    Query the events of the given LYLOUT files from their Arrow IPC files, instead of from SQLite.
+
+    The files are memory-mapped and the filters are evaluated column-wise with pyarrow.compute, so only
+    the filtered columns are scanned and only the matching rows are materialized.
+
+    Parameters:
+      filters (dict or list): Filter conditions to apply for querying (see _normalize_filters).
+      file_names (List[str], optional): Names of the LYLOUT files to query. Defaults to every file
+                                        stored in the database, which matches query_events_as_dataframe.
+      DB_PATH (str): Path to the SQLite database file. Defaults to "lylout_db.db".
+
+    Returns:
+      Optional[pd.DataFrame]: The matching events sorted by time (like query_events_as_dataframe), or None
+      if the filters use an operator the Arrow store does not support, or a file has no Arrow store,
+      in which case SQLite should be queried.
+    """
+    comparisons = []
+    for col, op, val in _normalize_filters(filters):
+        compare = _ARROW_COMPARISONS.get(op.strip())
+        if compare is None:
+            return None
+        comparisons.append((col, compare, val))
+
+    if file_names is None:
+        file_names = list(get_station_mask_orders(DB_PATH))
+
+    tables = []
+    for file_name in file_names:
+        path = _arrow_store_path(DB_PATH, file_name)
+        if not os.path.exists(path):
+            return None
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        if table.num_rows > 0:
+            tables.append(table)
+
+    if not tables:
+        return None
+    table = pa.concat_tables(tables)
+
+    try:
+        mask = None
+        for col, compare, val in comparisons:
+            condition = compare(table[col], val)
+            mask = condition if mask is None else pc.and_(mask, condition)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None  # e.g. comparing a text column to a number, which SQLite allows
+    if mask is not None:
+        table = table.filter(mask)
+
+    table = table.sort_by([("time_unix", "ascending"), ("id", "ascending")])
+    return table.to_pandas(self_destruct=True)
+
+
 def get_headers(DB_PATH="lylout_db.db") -> list:
     """
     Retrieve the column names (headers) from the 'events' table in the SQLite database.
@@ -319,25 +615,25 @@ def get_headers(DB_PATH="lylout_db.db") -> list:
     return headers
 
 
-def _parse_dat_extension(lylout_path: str, DB_PATH: str = "lylout_db.db"):
+def _read_dat_extension(lylout_path: str) -> pd.DataFrame:
     """
-    Parse a .dat file containing LYLOUT data, extract event information, and insert the events into the database.
+    Parse a .dat file containing LYLOUT data into a DataFrame of events, ready to be inserted into the database.
 
     The function performs the following:
       - Validates that the file has a .dat extension.
       - Reads the header to optionally override the default station mask order.
       - Extracts the base date from the header (using the format "Data start time: MM/DD/YY HH:MM:SS").
       - Locates the start of the data section marked by "*** data ***".
-      - Processes each subsequent line to extract event fields, including conversion from UT seconds to a Unix timestamp,
-        conversion of power from dBW to watts, and transformation of geodetic coordinates to ECEF.
-      - Inserts each parsed event into the 'events' table of the SQLite database.
+      - Reads the data section with pandas' C tokenizer, and converts all rows at once: UT seconds to a
+        Unix timestamp, the hexadecimal station bitmask to an integer (and its number of stations), and
+        geodetic coordinates to ECEF.
 
     Parameters:
       lylout_path (str): Path to the LYLOUT .dat file.
-      DB_PATH (str): Path to the SQLite database file. Defaults to "lylout_db.db".
 
     Returns:
-      None
+      pd.DataFrame: The events, with the columns of the 'events' table (excluding 'id'). The station mask
+                    order of the file is kept in the DataFrame's attrs["station_mask_order"].
 
     Raises:
       Exception: If the file does not have a .dat extension, the base date is not found, or the data section is missing.
@@ -345,32 +641,28 @@ def _parse_dat_extension(lylout_path: str, DB_PATH: str = "lylout_db.db"):
     if not lylout_path.lower().endswith(".dat"):
         raise Exception("File must be a .dat file")
 
-    with open(lylout_path, "r") as f:
-        lines = f.readlines()
-
-    # Find the beginning of data
+    # Read only the header; the data section is handed to pandas
+    header_lines = []
     data_start_index = None
-    for i, line in enumerate(lines):
-        if line.strip().startswith("*** data ***"):
-            data_start_index = i + 1
-            break
+    with open(lylout_path, "r") as f:
+        for i, line in enumerate(f):
+            if line.strip().startswith("*** data ***"):
+                data_start_index = i + 1
+                break
+            header_lines.append(line)
     if data_start_index is None:
         raise Exception("Data section not found.")
 
     # Check for an optional station mask order override in the header
     station_mask_order = DEFAULT_STATION_MASK_ORDER
-    for i, line in enumerate(lines):
-        if i >= data_start_index:
-            break
+    for line in header_lines:
         if line.startswith("Station mask order:"):
             station_mask_order = line.split("Station mask order:")[1].strip()
             break
 
     # Extract the base date from header (format: "Data start time: MM/DD/YY HH:MM:SS")
     base_date = None
-    for i, line in enumerate(lines):
-        if i >= data_start_index:
-            break
+    for line in header_lines:
         if line.startswith("Data start time:"):
             parts_date = line.split("Data start time:")[1].strip()
             base_date = datetime.datetime.strptime(parts_date, "%m/%d/%y %H:%M:%S")
@@ -381,9 +673,7 @@ def _parse_dat_extension(lylout_path: str, DB_PATH: str = "lylout_db.db"):
 
     # Detect header order from a "Data:" line, if present
     header_order = None
-    for i, line in enumerate(lines):
-        if i >= data_start_index:
-            break
+    for line in header_lines:
         if line.strip().startswith("Data:"):
             header_line = line.strip()[len("Data:"):].strip()
             header_order = [h.strip() for h in header_line.split(",")]
@@ -401,70 +691,132 @@ def _parse_dat_extension(lylout_path: str, DB_PATH: str = "lylout_db.db"):
         ]
     header_indices = {name: idx for idx, name in enumerate(header_order)}
 
+    required_fields = ["time (UT sec of day)", "lat", "lon", "alt(m)", "reduced chi^2", "P(dBW)", "mask"]
+    for field in required_fields:
+        if field not in header_indices:
+            raise Exception(f"Required header field missing: '{field}'")
+
+    data = pd.read_csv(
+        lylout_path,
+        skiprows=data_start_index,
+        sep=r"\s+",
+        header=None,
+        names=list(range(len(header_order))),
+        usecols=[header_indices[field] for field in required_fields],
+        dtype={header_indices["mask"]: str},
+        on_bad_lines="skip",
+    )
+    data = data.dropna()  # Skip incomplete lines
+
+    ut_sec = data[header_indices["time (UT sec of day)"]].to_numpy(dtype=np.float64)
+    lat = data[header_indices["lat"]].to_numpy(dtype=np.float64)
+    lon = data[header_indices["lon"]].to_numpy(dtype=np.float64)
+    alt = data[header_indices["alt(m)"]].to_numpy(dtype=np.float64)
+    reduced_chi2 = data[header_indices["reduced chi^2"]].to_numpy(dtype=np.float64)
+    power_db = data[header_indices["P(dBW)"]].to_numpy(dtype=np.float64)
+    mask_str = data[header_indices["mask"]].str.strip()
+
+    # Convert UT seconds (since midnight UTC) to Unix timestamp, at microsecond resolution
+    midnight = base_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    # (split like datetime.timedelta does, so timestamps round the same way as before)
+    frac_sec, whole_sec = np.modf(ut_sec)
+    ut_us = whole_sec.astype(np.int64) * 10**6 + np.round(frac_sec * 1e6).astype(np.int64)
+    time_unix = (int(midnight.timestamp()) * 10**6 + ut_us) / 10**6
+
+    # Convert the hexadecimal station bitmask to an integer, and count the stations of the
+    # (possibly overridden) station_mask_order that contributed.
+    # There are only a handful of distinct masks, so each is converted once.
+    unique_masks, mask_inverse = np.unique(mask_str.to_numpy(dtype=str), return_inverse=True)
+    mask_int = np.array([int(mask, 16) for mask in unique_masks], dtype=np.uint32)[mask_inverse]
+    num_stations = _popcount(mask_int & np.uint32((1 << len(station_mask_order)) - 1))
+
+    # Convert geodetic coordinates to ECEF using pyproj
+    x, y, z = transformer.transform(lon, lat, alt)
+
+    events = pd.DataFrame({
+        "time_unix": time_unix,
+        "lat": lat,
+        "lon": lon,
+        "alt": alt,
+        "reduced_chi2": reduced_chi2,
+        "num_stations": num_stations,
+        "power_db": power_db,
+        "mask_int": mask_int,
+        "x": x,
+        "y": y,
+        "z": z,
+        "file_name": os.path.basename(lylout_path),
+    })
+    events.attrs["station_mask_order"] = station_mask_order
+    return events
+
+
+def _insert_events(events: pd.DataFrame, DB_PATH: str = "lylout_db.db"):
+    """
+    Insert parsed events (see _read_dat_extension) into the database, in a single transaction,
+    and write them to the Arrow store (see query_events_from_arrow_store).
+
+    The events replace any events already stored for the same LYLOUT files (a modified file being
+    parsed again), so the database and the Arrow store always hold the same rows for a file.
+
+    The events are converted and inserted in batches of INSERT_BATCH_SIZE rows, so only one batch
+    is held as Python values at a time.
+
+    Parameters:
+      events (pd.DataFrame): The events to insert.
+      DB_PATH (str): Path to the SQLite database file. Defaults to "lylout_db.db".
+
+    Returns:
+      None
+
+    Raises:
+      Exception: If the database was built with another SCHEMA_VERSION (see _migrate_database).
+    """
     # Create the database and events table if they don't exist
     conn = _create_database_if_not_exist(DB_PATH)
-    cursor = conn.cursor()
+    try:
+        schema_version = _schema_version(conn)
+        if schema_version != SCHEMA_VERSION:
+            raise Exception(f"Database '{DB_PATH}' has layout version {schema_version}, expected {SCHEMA_VERSION}. "
+                            "Rebuild it with cache_and_parse_database, or remove it.")
+        file_names = events["file_name"].unique().tolist()
+        with conn:
+            cursor = conn.cursor()
+            for file_name in file_names:
+                cursor.execute("DELETE FROM events WHERE file_name = ?", (file_name,))
+                cursor.execute("DELETE FROM station_mask_orders WHERE file_name = ?", (file_name,))
+            for start in range(0, len(events), INSERT_BATCH_SIZE):
+                batch = events.iloc[start:start + INSERT_BATCH_SIZE]
+                # Convert column-wise to native Python values, which sqlite3 can bind directly
+                _add_to_database(cursor, zip(*(batch[column].tolist() for column in batch.columns)))
+            station_mask_order = events.attrs.get("station_mask_order", DEFAULT_STATION_MASK_ORDER)
+            conn.executemany(
+                "INSERT OR REPLACE INTO station_mask_orders (file_name, station_mask_order) VALUES (?, ?)",
+                [(file_name, station_mask_order) for file_name in file_names],
+            )
+
+        # Mirror all rows of the files into their Arrow stores
+        for file_name in file_names:
+            _write_arrow_store(conn, DB_PATH, file_name, "WHERE file_name = ?", [file_name])
+    finally:
+        conn.close()
 
-    # Extract filename from lylout path
-    file_name = os.path.basename(lylout_path)
 
-    # Process each data line
-    for line in lines[data_start_index:]:
-        if not line.strip():
-            continue
-        parts = line.split()
-        if len(parts) < len(header_order):
-            continue  # Skip incomplete lines
-        try:
-            ut_sec = float(parts[header_indices["time (UT sec of day)"]])
-            lat = float(parts[header_indices["lat"]])
-            lon = float(parts[header_indices["lon"]])
-            alt = float(parts[header_indices["alt(m)"]])
-            reduced_chi2 = float(parts[header_indices["reduced chi^2"]])
-            power_db = float(parts[header_indices["P(dBW)"]])
-            mask_str = parts[header_indices["mask"]]
-        except KeyError as e:
-            raise Exception(f"Required header field missing: {e}")
-
-        # Convert UT seconds (since midnight UTC) to Unix timestamp
-        midnight = base_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        event_time = midnight + datetime.timedelta(seconds=ut_sec)
-        time_unix = event_time.timestamp()
-
-        # Decode the station bitmask using the (possibly overridden) station_mask_order
-        stations_list = _decode_station_mask(mask_str, station_mask_order)
-
-        num_stations = len(stations_list.split(","))
-
-        # Convert geodetic coordinates to ECEF using pyproj
-        x, y, z = transformer.transform(lon, lat, alt)
-        
-        event = (
-            time_unix,
-            lat,
-            lon,
-            alt,
-            reduced_chi2,
-            num_stations,
-            power_db,
-            10 ** (power_db / 10),  # Conversion from dBW to linear watts
-            mask_str,
-            stations_list,
-            x,
-            y,
-            z,
-            file_name
-        )
-        
-        
-        try:
-            _add_to_database(cursor, event)
-        except Exception as e:
-            tprint("Issue with adding data:", event)
-            traceback.print_exc(file=sys.stdout)
+def _parse_dat_extension(lylout_path: str, DB_PATH: str = "lylout_db.db"):
+    """
+    Parse a .dat file containing LYLOUT data and insert the events into the database.
 
-    conn.commit()
-    conn.close()
+    Parameters:
+      lylout_path (str): Path to the LYLOUT .dat file.
+      DB_PATH (str): Path to the SQLite database file. Defaults to "lylout_db.db".
+
+    Returns:
+      None
+
+    Raises:
+      Exception: If the file does not have a .dat extension, the base date is not found, or the data section is missing.
+    """
+    _insert_events(_read_dat_extension(lylout_path), DB_PATH)
 
 
 def parse_lylout(lylout_path: str, DB_PATH: str = "lylout_db.db"):
@@ -479,20 +831,54 @@ def parse_lylout(lylout_path: str, DB_PATH: str = "lylout_db.db"):
 
     Returns:
       None
+
+    Raises:
+      Exception: If the database was built with another SCHEMA_VERSION (see _migrate_database).
     """
     if lylout_path.lower().endswith(".dat"):
         _parse_dat_extension(lylout_path, DB_PATH)
 
-def cache_and_parse_database(cache_dir: str, lightning_data_folder: str, data_extension: str, DB_PATH: str, CACHE_PATH: str):
+def _migrate_database(cache_dir: str, DB_PATH: str, CACHE_PATH: str):
+    """
+    Remove a database built with another SCHEMA_VERSION, together with its Arrow store, the
+    directory cache and the file log, so every LYLOUT file is parsed again into the current layout.
+
+    Parameters:
+      cache_dir (str): Directory path where the cache log file is stored.
+      DB_PATH (str): Path to the SQLite database file.
+      CACHE_PATH (str): Path to the cache file used to track processed data.
+
+    Returns:
+      None
+    """
+    if not os.path.exists(DB_PATH):
+        return
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        user_version = _schema_version(conn)
+    finally:
+        conn.close()
+    if user_version is None or user_version == SCHEMA_VERSION:
+        return
+
+    tprint(f"Database layout changed (version {user_version} -> {SCHEMA_VERSION}). Rebuilding the database")
+    for path in [DB_PATH, DB_PATH + "-wal", DB_PATH + "-shm", CACHE_PATH, os.path.join(cache_dir, "file_log.json")]:
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(os.path.dirname(_arrow_store_path(DB_PATH, "")), ignore_errors=True)
+
+
+def cache_and_parse_database(cache_dir: str, lightning_data_folder: str, data_extension: str, DB_PATH: str, CACHE_PATH: str, num_cores: int = 1):
     """
     Cache and parse lightning data files, updating the SQLite database if changes are detected.
 
     This function checks whether the contents of the specified lightning data folder have been cached.
     If not cached, it retrieves all files with the specified extension and processes each file by checking
-    if it has been logged (indicating previous processing). For any unlogged file, it parses the file to
-    update the database and then logs the file to avoid redundant processing. After processing, it updates
-    the cache to reflect the current state of the lightning data folder. If no changes are detected, it skips
-    reprocessing to save time.
+    if it has been logged (indicating previous processing). The unlogged files are parsed in parallel
+    (one file per worker process), inserted into the database by this process, and then logged to avoid
+    redundant processing. After processing, it updates the cache to reflect the current state of the
+    lightning data folder. If no changes are detected, it skips reprocessing to save time.
 
     Parameters:
       cache_dir (str): Directory path where the cache log file is stored.
@@ -500,22 +886,39 @@ def cache_and_parse_database(cache_dir: str, lightning_data_folder: str, data_ex
       data_extension (str): Extension used to filter the data files (e.g., ".dat").
       DB_PATH (str): Path to the SQLite database file.
       CACHE_PATH (str): Path to the cache file used to track processed data.
+      num_cores (int): Number of processes used to parse files. Defaults to 1.
 
     Returns:
       None
     """
+    _migrate_database(cache_dir, DB_PATH, CACHE_PATH)
     logger.LOG_FILE = os.path.join(cache_dir, "file_log.json")
     if not toolbox.is_cached(lightning_data_folder, CACHE_PATH):
         tprint("New data changed. Updating database")
         dat_file_paths = get_dat_files_paths(lightning_data_folder, data_extension)
+
+        new_file_paths = []
         for file_path in dat_file_paths:
             # If the file is not already processed into the SQLite database
             if not logger.is_logged(file_path):
                 tprint(file_path, "not appropriately added to the database. Adding...")
-                parse_lylout(file_path, DB_PATH)
-                logger.log_file(file_path)  # Log the file for no redundant re-processing into the database
+                new_file_paths.append(file_path)
             else:
                 tprint(file_path, "was parsed and added to the database already")
+
+        def insert_and_log(file_path, events):
+            _insert_events(events, DB_PATH)
+            logger.log_file(file_path)  # Log the file for no redundant re-processing into the database
+
+        # SQLite has a single writer, so only the parsing is spread over processes
+        if num_cores > 1 and len(new_file_paths) > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(num_cores, len(new_file_paths)), initializer=toolbox.pin_worker_threads) as executor:
+                for file_path, events in zip(new_file_paths, executor.map(_read_dat_extension, new_file_paths)):
+                    insert_and_log(file_path, events)
+        else:
+            for file_path in new_file_paths:
+                insert_and_log(file_path, _read_dat_extension(file_path))
+
         toolbox.save_cache_quick(lightning_data_folder, CACHE_PATH)
     else:
         tprint("Nothing changed with the database. Saving time...")
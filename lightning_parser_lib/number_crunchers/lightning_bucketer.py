@@ -5,164 +5,120 @@ import os
 import hashlib
 import re
 import datetime
-from tqdm import tqdm
-from typing import List, Tuple, Optional
-import multiprocessing
-from collections import Counter
-from . import toolbox
+import numba
+import pyarrow as pa
+import pyarrow.dataset as ds
+from typing import List, Tuple, Optional, Sequence, Union
 from .toolbox import tprint
 from . import lightning_stitcher
+from . import lightning_kernels
+from . import database_parser
 
 
 
 # Global constants for cache handling.
 RESULT_CACHE_FILE: str = "result_cache.pkl"
 
-global_shutdown_event = None
 
-def init_worker(shutdown_ev):
-    global global_shutdown_event
-    global_shutdown_event = shutdown_ev
-
-def _group_process(args_list):
-    """
-    Process a subset of time groups to cluster lightning events into strikes.
-    
-    Parameters:
-      args_list: Tuple containing:
-        - all_x_values: NumPy array of x coordinates for all lightning events.
-        - all_y_values: NumPy array of y coordinates for all lightning events.
-        - all_z_values: NumPy array of z coordinates for all lightning events.
-        - all_unix_values: NumPy array of Unix timestamps for all lightning events.
-        - unique_groups: Array of unique group identifiers (time buckets) for the current chunk.
-        - min_pts: Minimum number of events required to form a valid strike.
-        - group_ids: Array mapping each event to its time group.
-        - max_lightning_duration: Maximum allowed duration (in seconds) for a lightning strike.
-        - max_dist_between_pts: Maximum allowed spatial distance (in meters) between events.
-        - max_time_threshold: Maximum allowed time difference between consecutive events (seconds).
-        - min_speed: Minimum allowed speed (in m/s) between events.
-        - max_speed: Maximum allowed speed (in m/s) between events.
-        
-    Returns:
-      List of lightning strike clusters, each represented as a list of event indices.
+class BucketedStrikes:
     """
-    # Unpack input arguments.
-    all_x_values, all_y_values, all_z_values, all_unix_values, unique_groups, min_pts, group_ids, max_lightning_duration, max_dist_between_pts, max_time_threshold, min_speed, max_speed = args_list
-
-    lightning_strikes = []
-
-    for group in unique_groups:
-
-        if global_shutdown_event and global_shutdown_event.is_set():
-            break
-
-        group_indices = np.where(group_ids == group)[0]
-
-        # Skip groups with fewer points than required.
-        if len(group_indices) < min_pts:
-            continue
-
-        x_vals = all_x_values[group_indices]
-        y_vals = all_y_values[group_indices]
-        z_vals = all_z_values[group_indices]
-        unix_vals = all_unix_values[group_indices]
-
-        sub_groups = []  # Will hold potential lightning strikes for this group
-
-        for j in range(len(x_vals)):
-            if global_shutdown_event and global_shutdown_event.is_set():
-                break
-            event_x = x_vals[j]
-            event_y = y_vals[j]
-            event_z = z_vals[j]
-            event_unix = unix_vals[j]
-
-            # Finalize subgroups that have exceeded max_lightning_duration.
-            lightning_strikes += [
-                [group_indices[idx] for idx in sg["indices"]]
-                for sg in sub_groups
-                if event_unix - np.array(sg["unix"])[0] > max_lightning_duration and len(sg["indices"]) >= min_pts
-            ]
-            sub_groups = [
-                sg for sg in sub_groups
-                if event_unix - np.array(sg["unix"])[0] <= max_lightning_duration
-            ]
-
-            max_dist_squared = max_dist_between_pts ** 2
-            min_speed_squared = min_speed ** 2
-            max_speed_squared = max_speed ** 2
-
-            found = False
-            for sg in sub_groups:
-                if global_shutdown_event and global_shutdown_event.is_set():
-                    break
-                # Convert list to array for vectorized operations.
-                sg_unix = np.array(sg["unix"])
-                dt_all = np.abs(event_unix - sg_unix)
-                candidate_mask = dt_all <= max_time_threshold
-                if not np.any(candidate_mask):
-                    continue
-
-                candidate_x = np.array(sg["x"])[candidate_mask]
-                candidate_y = np.array(sg["y"])[candidate_mask]
-                candidate_z = np.array(sg["z"])[candidate_mask]
-                candidate_dt = dt_all[candidate_mask]
-
-                dx = candidate_x - event_x
-                dy = candidate_y - event_y
-                dz = candidate_z - event_z
-                distances_squared = dx * dx + dy * dy + dz * dz
-
-                if np.any(distances_squared <= max_dist_squared):
-                    # Check speed constraints.
-                    candidate_dt_squared = candidate_dt * candidate_dt
-                    dt_squared = np.where(candidate_dt_squared == 0, 1e-10, candidate_dt_squared)
-                    speeds_squared = distances_squared / dt_squared
-
-                    if np.any((speeds_squared >= min_speed_squared) & (speeds_squared <= max_speed_squared)):
-                        if event_unix - sg_unix[0] <= max_lightning_duration:
-                            sg["indices"].append(j)
-                            # Use list append rather than np.concatenate.
-                            sg["x"].append(event_x)
-                            sg["y"].append(event_y)
-                            sg["z"].append(event_z)
-                            sg["unix"].append(event_unix)
-                            found = True
-                            break
-
-            if not found:
-                # Start a new subgroup with list storage.
-                sub_groups.append({
-                    "indices": [j],
-                    "x": [event_x],
-                    "y": [event_y],
-                    "z": [event_z],
-                    "unix": [event_unix],
-                })
-
-        # Finalize any remaining valid subgroups.
-        for sg in sub_groups:
-            if len(sg["indices"]) >= min_pts:
-                final_subgroup = np.array([group_indices[idx] for idx in sg["indices"]], dtype=np.uint32)
-                lightning_strikes.append(final_subgroup)
-
-    return lightning_strikes
+    Lightning strikes stored as a CSR-style pair of flat arrays.
+
+    The event indices of strike i are indices[offsets[i]:offsets[i + 1]], so no per-strike Python
+    lists are kept around. The object behaves like the list of index lists it replaces
+    (len(), iteration, indexing, slicing), which keeps `events.iloc[bucketed_strikes_indices[i]]` working.
 
+    Attributes:
+      offsets (np.ndarray): int64 array of length n_strikes + 1 with the start of every strike in `indices`.
+      indices (np.ndarray): int32 array with the event indices of all strikes, back to back.
+    """
 
+    def __init__(self, offsets: np.ndarray, indices: np.ndarray):
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+
+    @classmethod
+    def from_lists(cls, strikes: Sequence[Sequence[int]]) -> "BucketedStrikes":
+        """
+        Build the CSR representation from a list of index lists.
+
+        Parameters:
+          strikes (Sequence[Sequence[int]]): A list of lightning strikes, each a list of event indices.
+
+        Returns:
+          BucketedStrikes: The same strikes in CSR form.
+        """
+        if isinstance(strikes, BucketedStrikes):
+            return strikes
+        sizes = np.fromiter((len(strike) for strike in strikes), dtype=np.int64, count=len(strikes))
+        offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        indices = np.empty(offsets[-1], dtype=np.int32)
+        for i, strike in enumerate(strikes):
+            indices[offsets[i]:offsets[i + 1]] = strike
+        return cls(offsets, indices)
+
+    def sizes(self) -> np.ndarray:
+        """
+        Returns:
+          np.ndarray: The number of events in every strike.
+        """
+        return np.diff(self.offsets)
+
+    def strike_view(self, i: int) -> np.ndarray:
+        """
+        Returns the event indices of strike i as a view into `indices` (no copy).
+        """
+        return self.indices[self.offsets[i]:self.offsets[i + 1]]
+
+    def select(self, keep: Union[slice, np.ndarray, Sequence[int]]) -> "BucketedStrikes":
+        """
+        Returns a new BucketedStrikes containing only the strikes selected by `keep`
+        (a slice, a boolean mask, or an array of strike numbers).
+        """
+        keep = np.arange(len(self))[keep]
+        sizes = self.sizes()[keep]
+        offsets = np.zeros(len(keep) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        # Gather every selected strike's slice of `indices` in one vectorized pass.
+        positions = np.repeat(self.offsets[:-1][keep] - offsets[:-1], sizes) + np.arange(offsets[-1])
+        return BucketedStrikes(offsets, self.indices[positions])
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += len(self)
+            if not 0 <= key < len(self):
+                raise IndexError("strike index out of range")
+            return self.strike_view(key)
+        return self.select(key)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.strike_view(i)
+
+    def __repr__(self) -> str:
+        return f"BucketedStrikes(num_strikes={len(self)}, num_points={len(self.indices)})"
+
+# Number of threads used by the bucketing kernel
 NUM_CORES = 1
+# No longer used for bucketing (the compiled kernel needs no chunking); kept for compatibility
 MAX_CHUNK_SIZE = 50000
 
 def _bucket_dataframe_lightnings(
-    df: pd.DataFrame,
+    xyzt: np.ndarray,
     max_time_threshold: float,
     max_lightning_duration: float,
     max_dist_between_pts: float,
     max_speed: float,
     min_speed: float = 0,
     min_pts: int = 0,
-) -> List[List[int]]:
+) -> BucketedStrikes:
     """
-    Buckets the DataFrame into groups of lightning strikes based on temporal and spatial constraints.
+    Buckets the events into groups of lightning strikes based on temporal and spatial constraints.
     
     Steps:
       1. Sort events chronologically by 'time_unix'.
@@ -173,9 +129,12 @@ def _bucket_dataframe_lightnings(
          - Spatial proximity (max_dist_between_pts).
          - Speed constraints (min_speed and max_speed).
          - Maximum lightning duration (max_lightning_duration) to finalize clusters.
+
+    The work is done by the compiled lightning_kernels.bucket_kernel, which processes the time buckets in
+    parallel on NUM_CORES threads (single threaded when the kernels are compiled ahead of time, see build_kernels.py).
          
     Parameters:
-      df (pd.DataFrame): DataFrame containing lightning event data.
+      xyzt (np.ndarray): (n, 4) array of "time_unix", "x", "y", "z" per event (see lightning_stitcher.events_to_xyzt).
       max_time_threshold (float): Maximum allowed time difference between consecutive events (seconds).
       max_lightning_duration (float): Maximum duration for a lightning strike (seconds).
       max_dist_between_pts (float): Maximum allowed spatial distance between events (meters).
@@ -184,74 +143,45 @@ def _bucket_dataframe_lightnings(
       min_pts (int, optional): Minimum number of events required for a valid lightning strike. Defaults to 0.
       
     Returns:
-      List[List[int]]: A list of lightning strike clusters, each represented as a list of event indices.
+      BucketedStrikes: The lightning strike clusters, holding event indices (rows of xyzt) in chronological order.
     """
-    df.sort_values(by="time_unix", inplace=True)
-    time_unix_array = np.asarray(df["time_unix"].values)
-    delta_t = np.diff(time_unix_array)
-
-    # Group events by time threshold using cumulative sum.
-    time_groups = np.concatenate(
-        (
-            np.array([0], dtype=np.int32),
-            np.cumsum((delta_t > max_time_threshold).astype(np.int32)),
-        )
-    )
-    tprint(time_groups)
-    tprint("Processing the buckets.")
-
-    group_ids = time_groups
-    group_counter = Counter(group_ids)
-
-    chunks = list(toolbox.chunk_items(group_counter, MAX_CHUNK_SIZE))
-
-    all_x_values = df["x"].values
-    all_y_values = df["y"].values
-    all_z_values = df["z"].values
-    all_unix_values = df["time_unix"].values
-
-    shutdown_event = multiprocessing.Event()
-
-    args_list = [
-        (all_x_values, all_y_values, all_z_values, all_unix_values, chunk, min_pts, group_ids, max_lightning_duration, max_dist_between_pts, max_time_threshold, min_speed, max_speed)
-        for chunk in chunks
-    ]
-
-    try:
-        lightning_strikes: List[List[int]] = []
-        if NUM_CORES > 1:
-            with multiprocessing.Pool(processes=NUM_CORES, initializer=init_worker, initargs=(shutdown_event,)) as pool:
-                for result in tqdm(pool.imap(_group_process, iterable=args_list), desc="Processing Chunks of Buckets",total=len(args_list)):
-                    lightning_strikes += result
-        else:
-            for args in tqdm(args_list, desc="Processing Chunks of Buckets", total=len(args_list)):
-                lightning_strikes += _group_process(args)
-    except KeyboardInterrupt:
-        shutdown_event.set()
-        return None
+    # Work in chronological order; results are mapped back to the rows of xyzt at the end.
+    order = np.argsort(xyzt[:, 0], kind="stable")
+    t, x, y, z = lightning_stitcher.xyzt_to_kernel_arrays(xyzt, order)
 
+    tprint("Processing the buckets.")
+    numba.set_num_threads(max(1, min(NUM_CORES, numba.config.NUMBA_NUM_THREADS)))
+    offsets, indices = lightning_kernels.bucket_kernel(
+        t, x, y, z,
+        float(max_dist_between_pts),
+        float(max_speed),
+        float(min_speed),
+        float(max_time_threshold),
+        float(max_lightning_duration),
+        int(min_pts),
+    )
 
-    tprint("Passed groups:", len(lightning_strikes))
-    return lightning_strikes
+    tprint("Passed groups:", len(offsets) - 1)
+    return BucketedStrikes(offsets, order[indices])
 
 
-def _compute_cache_key(df: pd.DataFrame, params: dict) -> str:
+def _compute_cache_key(xyzt: np.ndarray, params: dict) -> str:
     """
-    Compute a unique cache key based on the DataFrame and bucketing parameters.
+    Compute a unique cache key based on the event array and bucketing parameters.
     
     The key is composed of:
-      - DataFrame shape.
+      - Array shape.
       - Minimum and maximum 'time_unix' values.
       - Sorted bucketing parameters.
       
     Parameters:
-      df (pd.DataFrame): DataFrame containing lightning event data.
+      xyzt (np.ndarray): (n, 4) array of "time_unix", "x", "y", "z" per event.
       params (dict): Bucketing parameters.
       
     Returns:
       str: MD5 hash representing the unique cache key.
     """
-    key_str = f"{df.shape}_{df['time_unix'].min()}_{df['time_unix'].max()}_{sorted(params.items())}"
+    key_str = f"{xyzt.shape}_{xyzt[:, 0].min()}_{xyzt[:, 0].max()}_{sorted(params.items())}"
     return hashlib.md5(key_str.encode("utf-8")).hexdigest()
 
 
@@ -264,45 +194,46 @@ def delete_result_cache() -> None:
 
 
 def _get_result_cache(
-    df: pd.DataFrame, params: dict
-) -> Optional[Tuple[List[List[int]], List[Tuple[int, int]], datetime.datetime]]:
-    key = _compute_cache_key(df, params)
+    xyzt: np.ndarray, params: dict
+) -> Optional[Tuple[np.ndarray, np.ndarray, List[List[Tuple[int, int]]], datetime.datetime]]:
+    key = _compute_cache_key(xyzt, params)
     max_cache_life_days = params.get("max_cache_life_days", 30)
     if os.path.exists(RESULT_CACHE_FILE):
         try:
             with open(RESULT_CACHE_FILE, "rb") as f:
                 cache: dict = pkl.load(f)
 
-            for key, result in cache.items():
-                _, _, time_saved = result
+            for cached_key, result in list(cache.items()):
+                time_saved = result[-1]
                 now = datetime.datetime.now(tz=datetime.timezone.utc)
                 if now - time_saved > datetime.timedelta(days=max_cache_life_days):
                     tprint("Cached result expired. Removing outdated cache entry.")
                     # Remove the expired cache entry and update the file.
-                    del cache[key]
+                    del cache[cached_key]
                     with open(RESULT_CACHE_FILE, "wb") as f:
                         pkl.dump(cache, f)
             
-            if key in cache:
+            if key in cache and len(cache[key]) == 4:
                 tprint("Cache hit.")
                 return cache[key]
         except Exception as e:
             tprint(f"Cache load error: {e}")
-    return None, None, None
+    return None
 
 
 def save_result_cache(
-    df: pd.DataFrame, params: dict, result: Tuple[List[List[int]], List[Tuple[int, int]], datetime.datetime]
+    xyzt: np.ndarray, params: dict, result: Tuple[np.ndarray, np.ndarray, List[List[Tuple[int, int]]], datetime.datetime]
 ) -> None:
     """
     Save the bucketing result in the cache with the computed key.
     
     Parameters:
-      df (pd.DataFrame): DataFrame containing lightning event data.
+      xyzt (np.ndarray): (n, 4) array of "time_unix", "x", "y", "z" per event.
       params (dict): Bucketing parameters.
-      result (Tuple[List[List[int]], List[Tuple[int, int]]]): The bucketing result to be cached.
+      result (Tuple[np.ndarray, np.ndarray, List[List[Tuple[int, int]]], datetime.datetime]): The bucketing result
+          (offsets, indices, correlations, time saved) to be cached.
     """
-    key = _compute_cache_key(df, params)
+    key = _compute_cache_key(xyzt, params)
     cache = {}
     if os.path.exists(RESULT_CACHE_FILE):
         try:
@@ -316,9 +247,49 @@ def save_result_cache(
         pkl.dump(cache, f)
 
 
+def _group_correlations(bucketed_correlations: List[List[Tuple[int, int]]], min_pts: int) -> Tuple[BucketedStrikes, List[List[Tuple[int, int]]]]:
+    """
+    Regroup the stitched correlations into lightning strikes, one per connected chain of events.
+
+    Strikes are ordered by the first correlation of each chain, and the events of a strike by their
+    first appearance in its correlations.
+
+    Parameters:
+      bucketed_correlations (List[List[Tuple[int, int]]]): Correlations (parent, child) per time bucket.
+      min_pts (int): Minimum number of events required for a valid lightning strike.
+
+    Returns:
+      Tuple[BucketedStrikes, List[List[Tuple[int, int]]]]: The lightning strikes, and their correlations.
+    """
+    all_correlations = [correlation for correlations in bucketed_correlations for correlation in correlations]
+    # A chain of min_pts events needs at least min_pts - 1 correlations
+    if len(all_correlations) == 0 or len(all_correlations) < min_pts - 1:
+        return BucketedStrikes.from_lists([]), []
+
+    nodes, edges, first_seen, num_components, labels = lightning_stitcher.correlation_components(all_correlations)
+
+    # Number the chains by their first appearance.
+    component_first_seen = np.full(num_components, len(first_seen) * 2, dtype=np.int64)
+    np.minimum.at(component_first_seen, labels, first_seen)
+    node_strikes = np.argsort(np.argsort(component_first_seen, kind="stable"), kind="stable")[labels]
+
+    order = np.lexsort((first_seen, node_strikes))
+    offsets = np.searchsorted(node_strikes[order], np.arange(num_components + 1))
+    strikes = BucketedStrikes(offsets, nodes[order])
+
+    edge_strikes = node_strikes[edges[:, 0]]
+    edge_order = np.argsort(edge_strikes, kind="stable")
+    edge_offsets = np.searchsorted(edge_strikes[edge_order], np.arange(num_components + 1))
+    pairs = list(map(tuple, nodes[edges[edge_order]].tolist()))
+    correlations = [pairs[edge_offsets[i]:edge_offsets[i + 1]] for i in range(num_components)]
+
+    keep = np.nonzero(strikes.sizes() >= min_pts)[0]
+    return strikes.select(keep), [correlations[i] for i in keep]
+
+
 def bucket_dataframe_lightnings(
-    df: pd.DataFrame, params: dict
-) -> Tuple[List[List[int]], List[Tuple[int, int]]]:
+    xyzt: np.ndarray, params: dict
+) -> Tuple[np.ndarray, np.ndarray, List[List[Tuple[int, int]]]]:
     """
     Bucket lightning strikes in the dataframe using provided temporal and spatial parameters.
     
@@ -337,26 +308,28 @@ def bucket_dataframe_lightnings(
       - max_lightning_duration (float): Maximum duration for a lightning strike (seconds).
       
     Parameters:
-      df (pd.DataFrame): DataFrame containing lightning event data.
+      xyzt (np.ndarray): (n, 4) array of "time_unix", "x", "y", "z" per event, as produced by
+                         lightning_stitcher.events_to_xyzt. Indices in the result refer to its rows.
       params (dict): Additional keyword arguments for bucketing behavior.
       
     Returns:
-      Tuple[List[List[int]], List[Tuple[int, int]]]: A tuple containing:
-         - A list of lightning strike clusters (each is a list of event indices).
-         - A list of correlations between event indices.
+      Tuple[np.ndarray, np.ndarray, List[List[Tuple[int, int]]]]: A tuple containing:
+         - offsets (int64): Start of every lightning strike in `indices` (length n_strikes + 1).
+         - indices (int32): Event indices of all lightning strikes, back to back (see BucketedStrikes).
+         - A list of correlations between event indices, per lightning strike.
     """
     use_cache = params.get("cache_results", False)
 
     if use_cache:
-        cached_data = _get_result_cache(df, params)
+        cached_data = _get_result_cache(xyzt, params)
         if cached_data is not None:
-            filtered_groups, bucketed_correlations, time_saved = cached_data
-            if not (not filtered_groups or not bucketed_correlations or not time_saved):
+            offsets, indices, bucketed_correlations, time_saved = cached_data
+            if len(offsets) > 1 and bucketed_correlations and time_saved:
                 tprint("Using cached result from earlier")
-                return filtered_groups, bucketed_correlations
+                return offsets, indices, bucketed_correlations
 
     raw_groups = _bucket_dataframe_lightnings(
-        df,
+        xyzt,
         max_time_threshold=params.get("max_lightning_time_threshold", 1),
         max_lightning_duration=params.get("max_lightning_duration", 20.0),
         max_dist_between_pts=params.get("max_lightning_dist", 50000),
@@ -365,64 +338,44 @@ def bucket_dataframe_lightnings(
         min_pts=params.get("min_lightning_points", 300),
     )
 
-    if raw_groups == None:
-        return None, None
-
-    temp_bucketed_correlations = lightning_stitcher.stitch_lightning_strikes(raw_groups, df, params)
-
-
-    bucketed_correlations: List[List[Tuple[int, int]]] = []
-    filtered_groups: List[List[int]] = []
-    for correlations in temp_bucketed_correlations:
-        for correlation in correlations:
-            child_indece = correlation[0]
-            parent_indece = correlation[1]
-
-            found_i = False
-            child_in_group = False
-            parent_in_group = False
-            index_used = 0
-            for i, temp_filtered_group in enumerate(filtered_groups):
-                child_in_group = (child_indece in temp_filtered_group)
-                parent_in_group = (parent_indece in temp_filtered_group)
-                if child_in_group or parent_in_group:
-                    found_i = True
-                    index_used = i
-                    break
-            
-            if found_i:
-                if not child_in_group:
-                    filtered_groups[index_used].append(child_indece)
-                if not parent_in_group:
-                    filtered_groups[index_used].append(parent_indece)
-                bucketed_correlations[index_used].append((child_indece, parent_indece))
-            else:
-                filtered_groups.append([child_indece, parent_indece])
-                bucketed_correlations.append([(child_indece, parent_indece)])
-                        
+    temp_bucketed_correlations = lightning_stitcher.stitch_lightning_strikes(raw_groups, xyzt, params)
+
+
+    strikes, bucketed_correlations = _group_correlations(temp_bucketed_correlations, params.get("min_lightning_points", 300))
+
     if use_cache:
         now = datetime.datetime.now(tz=datetime.timezone.utc)
-        save_result_cache(df, params, (filtered_groups, bucketed_correlations, now))
+        save_result_cache(xyzt, params, (strikes.offsets, strikes.indices, bucketed_correlations, now))
 
-    return filtered_groups, bucketed_correlations
+    return strikes.offsets, strikes.indices, bucketed_correlations
 
 
-def export_as_csv(bucketed_strike_indices: List[List[int]], events: pd.DataFrame, output_dir: str) -> None:
+def export_as_csv(bucketed_strike_indices: Union[BucketedStrikes, List[List[int]]], events: pd.DataFrame, output_dir: str, DB_PATH: str = "lylout_db.db") -> None:
     """
     Exports each lightning strike cluster to a CSV file in the specified output directory.
+
+    All strike rows are gathered from the events with a single take() and split per strike with a
+    groupby, instead of indexing the events DataFrame once per strike.
     
     Parameters:
-      bucketed_strike_indices (List[List[int]]): List of clusters, where each cluster is a list of event indices.
+      bucketed_strike_indices (BucketedStrikes | List[List[int]]): Clusters, where each cluster is a list of event indices.
       events (pd.DataFrame): DataFrame containing event data.
       output_dir (str): Directory where CSV files will be saved.
+      DB_PATH (str): Path to the SQLite database file, used to decode the station names (see database_parser.with_stations).
     """
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    for indices in bucketed_strike_indices:
-        # Extract events corresponding to the lightning strike and sort by time.
-        strike_df = events.iloc[indices].sort_values(by="time_unix")
-        start_time_unix = strike_df.iloc[0]["time_unix"]
+    strikes = BucketedStrikes.from_lists(bucketed_strike_indices)
+    strike_ids = np.repeat(np.arange(len(strikes)), strikes.sizes())
+
+    # Sort by time within each strike once, for all strikes together.
+    order = np.lexsort((events["time_unix"].to_numpy()[strikes.indices], strike_ids))
+    all_strikes_df = database_parser.with_power(events.take(strikes.indices[order]))
+    all_strikes_df = database_parser.with_stations(all_strikes_df, DB_PATH)
+
+    for _, strike_df in all_strikes_df.groupby(strike_ids[order], sort=False):
+        start_time_unix = strike_df["time_unix"].iat[0]
         start_time_dt = datetime.datetime.fromtimestamp(
             start_time_unix, tz=datetime.timezone.utc
         ).strftime("%Y-%m-%d %H:%M:%S UTC")
@@ -436,3 +389,40 @@ def export_as_csv(bucketed_strike_indices: List[List[int]], events: pd.DataFrame
 
         strike_df.to_csv(output_filename, index=False)
         tprint(f"Exported lightning strike CSV to {output_filename}")
+
+
+def export_as_parquet(bucketed_strike_indices: Union[BucketedStrikes, List[List[int]]], events: pd.DataFrame, output_dir: str, DB_PATH: str = "lylout_db.db") -> None:
+    """
+    Exports all lightning strike clusters as a single Parquet dataset, partitioned by strike.
+
+    The rows of every strike are written (sorted by time) under `output_dir/strike_id=<i>/` with the
+    PyArrow dataset writer, instead of one CSV file per strike. Read it back with
+    `pd.read_parquet(output_dir)` or `pyarrow.dataset.dataset(output_dir, partitioning="hive")`.
+
+    Parameters:
+      bucketed_strike_indices (BucketedStrikes | List[List[int]]): Clusters, where each cluster is a list of event indices.
+      events (pd.DataFrame): DataFrame containing event data.
+      output_dir (str): Directory where the dataset will be saved.
+      DB_PATH (str): Path to the SQLite database file, used to decode the station names (see database_parser.with_stations).
+    """
+    strikes = BucketedStrikes.from_lists(bucketed_strike_indices)
+    strike_ids = np.repeat(np.arange(len(strikes), dtype=np.int32), strikes.sizes())
+
+    # Sort by time within each strike once, for all strikes together.
+    order = np.lexsort((events["time_unix"].to_numpy()[strikes.indices], strike_ids))
+    all_strikes_df = database_parser.with_power(events.take(strikes.indices[order]).reset_index(drop=True))
+    all_strikes_df = database_parser.with_stations(all_strikes_df, DB_PATH)
+    all_strikes_df["strike_id"] = strike_ids[order]
+
+    max_rows_per_file = 1_000_000
+    ds.write_dataset(
+        pa.Table.from_pandas(all_strikes_df, preserve_index=False),
+        base_dir=output_dir,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("strike_id", pa.int32())]), flavor="hive"),
+        existing_data_behavior="overwrite_or_ignore",
+        max_partitions=max(len(strikes), 1024),
+        max_rows_per_file=max_rows_per_file,
+        max_rows_per_group=max_rows_per_file,
+    )
+    tprint(f"Exported {len(strikes)} lightning strikes to {output_dir}")
@@ -0,0 +1,248 @@
+"""
+Compiled (Numba) kernels for the lightning bucketer.
+
+The kernels operate on plain NumPy arrays (structure of arrays: t, x, y, z), sorted by time,
+so they can be JIT compiled with parallel loops and cached on disk between runs. Time is float64,
+positions are float32 relative to a common origin (see lightning_stitcher.xyzt_to_kernel_arrays).
+
+When the ahead-of-time compiled module lightning_kernels_aot (see build_kernels.py) is present next to
+this file, its kernels are used instead, and nothing is JIT compiled at all. They run single threaded.
+"""
+import os
+import numpy as np
+import numba
+from numba import njit, prange
+
+# The kernels run in the parent process, which then forks worker pools for parsing and exporting.
+# A forked TBB pool can hang the parent on exit, so prefer OpenMP (then workqueue). This changes Numba's
+# process-wide setting, so it is only done when neither the environment (NUMBA_THREADING_LAYER or
+# NUMBA_THREADING_LAYER_PRIORITY) nor the host application chose a threading layer.
+if ("NUMBA_THREADING_LAYER" not in os.environ and "NUMBA_THREADING_LAYER_PRIORITY" not in os.environ
+        and numba.config.THREADING_LAYER == "default"):
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "workqueue", "tbb"]
+
+
+@njit(fastmath=True, cache=True)
+def _cluster_time_group(t, x, y, z, start, end, labels, max_dist_squared, max_speed_squared, min_speed_squared, max_time_threshold, max_lightning_duration):
+    """
+    Cluster the events t[start:end] (one time group) into sub groups, writing the local sub group
+    number of every event into labels[start:end].
+
+    Every event joins the first (oldest) still open sub group that has a member within max_time_threshold
+    seconds, with at least one such member within max_dist and at least one such member within the
+    speed limits. Otherwise the event starts a new sub group. A sub group closes once it spans more than
+    max_lightning_duration seconds.
+
+    Returns:
+      int: The number of sub groups created.
+    """
+    num_pts = end - start
+    sub_group_start_times = np.empty(num_pts, dtype=np.float64)
+    # Stamp arrays (holding the event being processed) replace per-event boolean resets.
+    dist_stamps = np.full(num_pts, -1, dtype=np.int64)
+    speed_stamps = np.full(num_pts, -1, dtype=np.int64)
+    num_sub_groups = 0
+
+    for j in range(start, end):
+        best = -1
+
+        # Events are sorted by time, so the candidates are the events directly before j.
+        m = j - 1
+        while m >= start and t[j] - t[m] <= max_time_threshold:
+            sub_group = labels[m]
+            if t[j] - sub_group_start_times[sub_group] <= max_lightning_duration:
+                dx = x[j] - x[m]
+                dy = y[j] - y[m]
+                dz = z[j] - z[m]
+                distance_squared = dx * dx + dy * dy + dz * dz
+                if distance_squared <= max_dist_squared:
+                    dist_stamps[sub_group] = j
+
+                dt = t[j] - t[m]
+                dt_squared = dt * dt
+                if dt_squared == 0:
+                    dt_squared = 1e-10
+                speed_squared = distance_squared / dt_squared
+                if speed_squared >= min_speed_squared and speed_squared <= max_speed_squared:
+                    speed_stamps[sub_group] = j
+
+                if dist_stamps[sub_group] == j and speed_stamps[sub_group] == j and (best < 0 or sub_group < best):
+                    best = sub_group
+            m -= 1
+
+        if best < 0:
+            best = num_sub_groups
+            sub_group_start_times[best] = t[j]
+            num_sub_groups += 1
+        labels[j] = best
+
+    return num_sub_groups
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def bucket_kernel(t, x, y, z, max_dist, max_speed, min_speed, max_time_threshold, max_lightning_duration, min_pts):
+    """
+    Bucket time sorted events into lightning strikes.
+
+    Events are first split into time groups wherever consecutive events are more than max_time_threshold
+    seconds apart. The time groups are clustered in parallel (see _cluster_time_group), and clusters with
+    fewer than min_pts events are dropped.
+
+    Parameters:
+      t, x, y, z (np.ndarray): Time (seconds, float64) and position relative to a common origin (meters, float32), sorted by time.
+      max_dist (float): Maximum allowed spatial distance between events (meters).
+      max_speed (float): Maximum allowed speed between events (m/s).
+      min_speed (float): Minimum allowed speed between events (m/s).
+      max_time_threshold (float): Maximum allowed time difference between consecutive events (seconds).
+      max_lightning_duration (float): Maximum duration for a lightning strike (seconds).
+      min_pts (int): Minimum number of events required for a valid lightning strike.
+
+    Returns:
+      Tuple[np.ndarray, np.ndarray]: CSR (offsets, indices) of the lightning strikes, where offsets is int64
+      and indices is int32 holding positions into the (sorted) input arrays.
+    """
+    num_pts = len(t)
+
+    # Time groups, as [group_starts[g], group_starts[g + 1]) ranges.
+    num_groups = 1 if num_pts > 0 else 0
+    for i in range(1, num_pts):
+        if t[i] - t[i - 1] > max_time_threshold:
+            num_groups += 1
+    group_starts = np.empty(num_groups + 1, dtype=np.int64)
+    group_starts[0] = 0
+    group_starts[num_groups] = num_pts
+    g = 1
+    for i in range(1, num_pts):
+        if t[i] - t[i - 1] > max_time_threshold:
+            group_starts[g] = i
+            g += 1
+
+    labels = np.full(num_pts, -1, dtype=np.int64)
+    num_sub_groups = np.zeros(num_groups, dtype=np.int64)
+    for g in prange(num_groups):
+        start = group_starts[g]
+        end = group_starts[g + 1]
+        # Skip groups with fewer points than required.
+        if end - start < min_pts:
+            continue
+        num_sub_groups[g] = _cluster_time_group(t, x, y, z, start, end, labels,
+                                                max_dist * max_dist, max_speed * max_speed, min_speed * min_speed,
+                                                max_time_threshold, max_lightning_duration)
+
+    # Global number of every sub group, and its size.
+    sub_group_bases = np.zeros(num_groups + 1, dtype=np.int64)
+    for g in range(num_groups):
+        sub_group_bases[g + 1] = sub_group_bases[g] + num_sub_groups[g]
+    sizes = np.zeros(sub_group_bases[num_groups], dtype=np.int64)
+    for g in range(num_groups):
+        for i in range(group_starts[g], group_starts[g + 1]):
+            if labels[i] >= 0:
+                labels[i] += sub_group_bases[g]
+                sizes[labels[i]] += 1
+
+    # Keep the sub groups with enough points, and lay them out back to back.
+    strike_numbers = np.full(len(sizes), -1, dtype=np.int64)
+    num_strikes = 0
+    for s in range(len(sizes)):
+        if sizes[s] >= min_pts:
+            strike_numbers[s] = num_strikes
+            num_strikes += 1
+
+    offsets = np.zeros(num_strikes + 1, dtype=np.int64)
+    for s in range(len(sizes)):
+        if strike_numbers[s] >= 0:
+            offsets[strike_numbers[s] + 1] = sizes[s]
+    for s in range(num_strikes):
+        offsets[s + 1] += offsets[s]
+
+    indices = np.empty(offsets[num_strikes], dtype=np.int32)
+    cursors = offsets[:-1].copy()
+    for i in range(num_pts):
+        if labels[i] >= 0:
+            strike = strike_numbers[labels[i]]
+            if strike >= 0:
+                indices[cursors[strike]] = i
+                cursors[strike] += 1
+
+    return offsets, indices
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def stitch_kernel(t, x, y, z, max_dist, max_speed, min_speed, max_time_threshold):
+    """
+    Find the parent of every event of a time sorted lightning strike.
+
+    The parent of event i is the spatially closest earlier event (lowest position on ties) that is within
+    max_dist, within max_time_threshold seconds, and within the speed limits. Only the events inside the
+    time window are visited, instead of every earlier event.
+
+    Parameters:
+      t, x, y, z (np.ndarray): Time (seconds, float64) and position relative to a common origin (meters, float32), sorted by time.
+      max_dist (float): Maximum allowed spatial distance between events (meters).
+      max_speed (float): Maximum allowed speed between events (m/s).
+      min_speed (float): Minimum allowed speed between events (m/s).
+      max_time_threshold (float): Maximum allowed time difference between events (seconds).
+
+    Returns:
+      np.ndarray: int64 array with the position of the parent of every event, or -1 if it has none.
+    """
+    num_pts = len(t)
+    max_dist_squared = max_dist * max_dist
+    max_speed_squared = max_speed * max_speed
+    min_speed_squared = min_speed * min_speed
+    max_time_threshold_squared = max_time_threshold * max_time_threshold
+
+    parents = np.full(num_pts, -1, dtype=np.int64)
+    for i in prange(num_pts):
+        best_distance_squared = np.inf
+        m = i - 1
+        while m >= 0:
+            dt = t[i] - t[m]
+            dt_squared = dt * dt
+            if dt_squared > max_time_threshold_squared:
+                break
+            if dt_squared == 0:
+                dt_squared = 1e-10
+
+            dx = x[i] - x[m]
+            dy = y[i] - y[m]
+            dz = z[i] - z[m]
+            distance_squared = dx * dx + dy * dy + dz * dz
+            speed_squared = distance_squared / dt_squared
+            if (distance_squared <= max_dist_squared and speed_squared <= max_speed_squared
+                    and speed_squared >= min_speed_squared and distance_squared <= best_distance_squared):
+                best_distance_squared = distance_squared
+                parents[i] = m
+            m -= 1
+
+    return parents
+
+
+# Signatures of the kernels compiled ahead of time by build_kernels.py
+AOT_SIGNATURES = {
+    "bucket_kernel": "Tuple((i8[:], i4[:]))(f8[:], f4[:], f4[:], f4[:], f8, f8, f8, f8, f8, i8)",
+    "stitch_kernel": "i8[:](f8[:], f4[:], f4[:], f4[:], f8, f8, f8, f8)",
+}
+
+# The JIT compiled kernels, by name (the module attributes are replaced when the AOT module is present)
+JIT_KERNELS = {
+    "bucket_kernel": bucket_kernel,
+    "stitch_kernel": stitch_kernel,
+}
+
+
+def warmup():
+    """
+    Compile (or load from the on-disk cache) the kernels with tiny inputs, so the JIT cost is not paid
+    in the middle of the first bucketing call.
+    """
+    t = np.zeros(2, dtype=np.float64)
+    xyz = np.zeros(2, dtype=np.float32)
+    bucket_kernel(t, xyz, xyz, xyz, 1.0, 1.0, 0.0, 1.0, 1.0, 1)
+    stitch_kernel(t, xyz, xyz, xyz, 1.0, 1.0, 0.0, 1.0)
+
+
+try:
+    from .lightning_kernels_aot import bucket_kernel, stitch_kernel
+except ImportError:
+    warmup()
@@ -25,6 +25,7 @@ global_shutdown_event = None
 def init_worker(shutdown_ev):
     global global_shutdown_event
     global_shutdown_event = shutdown_ev
+    toolbox.pin_worker_threads()
 
 @deprecated(details="Plotly uses Kaleidoscope. Currently, Kaleidoscope engine has issues saving images. This function will continue to exist but will no longer be supported.")
 def plot_strikes_over_time(
@@ -53,8 +54,9 @@ def plot_strikes_over_time(
     """
     # Prepare data: For each bucket, extract the start time (as a timezone-aware datetime) and the number of strike points.
     plot_data = []
+    time_unix = events["time_unix"].to_numpy()
     for strike in bucketed_strikes_indices_sorted:
-        start_time_unix = events.iloc[strike[0]]["time_unix"]
+        start_time_unix = time_unix[strike[0]]
         dt = datetime.datetime.fromtimestamp(start_time_unix, tz=datetime.timezone.utc)
         plot_data.append({"Time": dt, "Strike Points": len(strike)})
 
@@ -261,12 +263,14 @@ def generate_strike_gif(
     """
 
     # Preprocess: sort indices by time and extract corresponding times into a NumPy array.
-    sorted_indices = sorted(strike_indices, key=lambda idx: events.loc[idx, "time_unix"])
-    sorted_times = np.array([events.loc[idx, "time_unix"] for idx in sorted_indices])
+    strike_times = events.loc[strike_indices, "time_unix"].to_numpy()
+    time_order = np.argsort(strike_times, kind="stable")
+    sorted_indices = np.asarray(strike_indices)[time_order]
+    sorted_times = strike_times[time_order]
 
     # Determine the overall time span among the selected events.
-    min_time = events.loc[sorted_indices[0], "time_unix"]
-    max_time = events.loc[sorted_indices[-1], "time_unix"]
+    min_time = sorted_times[0]
+    max_time = sorted_times[-1]
     time_interval = (max_time - min_time) / num_frames
 
     strike_events = events.iloc[strike_indices]
@@ -481,36 +485,23 @@ def plot_lightning_stitch(
     marker_time_str = marker_time_dt.strftime(f"%Y-%m-%d %H:%M:%S.{frac:02d} UTC")
 
     plot_range = _range
-    computed_lat_min, computed_lat_max, computed_lon_min, computed_lon_max = None, None, None, None
-    avg_unixes = []  # List to store average unix time for each segment
-
     x_dim: str = _dimensions[0][0] or "lon" # i.e. "lon"
     x_header: str = _dimensions[0][1] or "Longitude"
     y_dim: str = _dimensions[1][0] or "lat" # i.e. "lat"
     y_header: str = _dimensions[1][1] or "Latitude"
 
+    # Look up the (parent, child) rows of all correlations at once.
+    pair_events = events.loc[np.asarray(lightning_correlations, dtype=np.int64).ravel()]
+    pair_x = pair_events[x_dim].to_numpy().reshape(-1, 2)
+    pair_y = pair_events[y_dim].to_numpy().reshape(-1, 2)
+    pair_time_unix = pair_events["time_unix"].to_numpy().reshape(-1, 2)
+
     # First pass: compute plot range and collect average unix times.
-    for parent_idx, child_idx in lightning_correlations:
-        parent_row = events.loc[parent_idx]
-        child_row = events.loc[child_idx]
-        x1, y1 = parent_row[x_dim], parent_row[y_dim]
-        x2, y2 = child_row[x_dim], child_row[y_dim]
-
-        # Update computed range
-        for x_val in [x1, x2]:
-            if computed_lon_min is None or x_val < computed_lon_min:
-                computed_lon_min = x_val
-            if computed_lon_max is None or x_val > computed_lon_max:
-                computed_lon_max = x_val
-        for y_val in [y1, y2]:
-            if computed_lat_min is None or y_val < computed_lat_min:
-                computed_lat_min = y_val
-            if computed_lat_max is None or y_val > computed_lat_max:
-                computed_lat_max = y_val
-
-        # Compute the average unix time for the segment.
-        avg_unix = np.average([parent_row["time_unix"], child_row["time_unix"]])
-        avg_unixes.append(avg_unix)
+    computed_lon_min, computed_lon_max = pair_x.min(), pair_x.max()
+    computed_lat_min, computed_lat_max = pair_y.min(), pair_y.max()
+
+    # Compute the average unix time for each segment.
+    avg_unixes = pair_time_unix.mean(axis=1).tolist()
 
     if plot_range is None:
         plot_range = [[computed_lat_min, computed_lat_max], [computed_lon_min, computed_lon_max]]
@@ -523,18 +514,16 @@ def plot_lightning_stitch(
     line_traces = []
     unique_indices = set()
     for i, (parent_idx, child_idx) in enumerate(lightning_correlations):
-        parent_row = events.loc[parent_idx]
-        child_row = events.loc[child_idx]
         unique_indices.add(parent_idx)
         unique_indices.add(child_idx)
         # Calculate seconds after the earliest event.
-        seconds_after = np.average([parent_row["time_unix"], child_row["time_unix"]]) - unix_offset
+        seconds_after = avg_unixes[i] - unix_offset
         # Compute interpolation factor t (0 = earliest, 1 = latest).
         t = seconds_after / max_diff if max_diff else 0.5
         color = sample_colorscale('Cividis', t)[0]
         trace = go.Scatter(
-            x=[parent_row[x_dim], child_row[x_dim]],
-            y=[parent_row[y_dim], child_row[y_dim]],
+            x=pair_x[i].tolist(),
+            y=pair_y[i].tolist(),
             mode="lines",
             line=dict(color=color, width=2),
             showlegend=False,
@@ -559,14 +548,10 @@ def plot_lightning_stitch(
     )
 
     # Extract coordinates for the strike points.
-    points_x = []
-    points_y = []
-    point_powers = []
-    for idx in unique_indices:
-        row = events.loc[idx]
-        points_x.append(row[x_dim])
-        points_y.append(row[y_dim])
-        point_powers.append(row["power_db"])
+    unique_points = events.loc[list(unique_indices)]
+    points_x = unique_points[x_dim].tolist()
+    points_y = unique_points[y_dim].tolist()
+    point_powers = unique_points["power_db"].tolist()
 
     # Create a scatter trace for the strike points with a second colorbar for power_db.
     points_trace = go.Scatter(
@@ -650,24 +635,13 @@ def plot_lightning_stitch_gif(
     """
 
     # Sort the correlations by the child's event time to ensure proper progression.
-    sorted_correlations = sorted(lightning_correlations, key=lambda corr: events.loc[corr[1], "time_unix"])
+    pairs = np.asarray(lightning_correlations, dtype=np.int64).reshape(-1, 2)
+    pair_events = events.loc[pairs.ravel()]
+    child_times = pair_events["time_unix"].to_numpy()[1::2]
+    sorted_correlations = [lightning_correlations[i] for i in np.argsort(child_times, kind="stable")]
     
     # Compute the full plot range from all correlations if not provided.
-    computed_lat_min, computed_lat_max, computed_lon_min, computed_lon_max = None, None, None, None
-    for parent_idx, child_idx in lightning_correlations:
-        parent_row = events.loc[parent_idx]
-        child_row = events.loc[child_idx]
-        for lat_val in [parent_row["lat"], child_row["lat"]]:
-            if computed_lat_min is None or lat_val < computed_lat_min:
-                computed_lat_min = lat_val
-            if computed_lat_max is None or lat_val > computed_lat_max:
-                computed_lat_max = lat_val
-        for lon_val in [parent_row["lon"], child_row["lon"]]:
-            if computed_lon_min is None or lon_val < computed_lon_min:
-                computed_lon_min = lon_val
-            if computed_lon_max is None or lon_val > computed_lon_max:
-                computed_lon_max = lon_val
-    full_range = [[computed_lat_min, computed_lat_max], [computed_lon_min, computed_lon_max]]
+    full_range = [[pair_events["lat"].min(), pair_events["lat"].max()], [pair_events["lon"].min(), pair_events["lon"].max()]]
     
     frames = []
     total_corr = len(sorted_correlations)
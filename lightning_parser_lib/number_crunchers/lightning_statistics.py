@@ -1,9 +1,59 @@
 import copy
-import math
 import numpy as np
 from scipy.stats import skew, kurtosis
-from typing import List, Tuple
+from typing import List, Tuple, Union
 import pandas as pd
+from .lightning_bucketer import BucketedStrikes
+
+
+def compute_strike_stats(events: pd.DataFrame, bucketed_strikes_indices: Union[BucketedStrikes, List[List[int]]], time_column: str = "time_unix") -> pd.DataFrame:
+    """
+    Compute per-strike aggregates (time span, size, bounding box and mean power) for all strikes at once.
+
+    The strikes are laid out back to back (see BucketedStrikes), so every aggregate is a single
+    np.minimum/maximum/add.reduceat over the gathered event columns.
+
+    Parameters:
+      events (pd.DataFrame): The DataFrame containing event data with columns 'lat', 'lon', 'alt', 'power_db' and time_column.
+      bucketed_strikes_indices (BucketedStrikes | List[List[int]]): Indices of the events of every strike.
+      time_column (str): Column holding the event time in seconds. Defaults to 'time_unix'.
+
+    Returns:
+      pd.DataFrame: One row per strike with the columns 'start_time', 'end_time', 'mean_time',
+                    'duration', 'num_pts', 'min_lat', 'max_lat', 'min_lon', 'max_lon', 'min_alt', 'max_alt'
+                    and 'mean_power_db'. Aggregates of empty strikes are NaN.
+    """
+    strikes = BucketedStrikes.from_lists(bucketed_strikes_indices)
+    num_pts = strikes.sizes()
+
+    # reduceat does not handle empty segments, so only the non-empty strikes are reduced.
+    non_empty = num_pts > 0
+    starts = strikes.offsets[:-1][non_empty]
+
+    def reduce(ufunc, column):
+        result = np.full(len(strikes), np.nan)
+        if len(starts):
+            result[non_empty] = ufunc.reduceat(events[column].to_numpy(dtype=np.float64)[strikes.indices], starts)
+        return result
+
+    def mean(column):
+        return reduce(np.add, column) / num_pts
+
+    stats = pd.DataFrame({
+        "start_time": reduce(np.minimum, time_column),
+        "end_time": reduce(np.maximum, time_column),
+        "mean_time": mean(time_column),
+        "num_pts": num_pts,
+        "min_lat": reduce(np.minimum, "lat"),
+        "max_lat": reduce(np.maximum, "lat"),
+        "min_lon": reduce(np.minimum, "lon"),
+        "max_lon": reduce(np.maximum, "lon"),
+        "min_alt": reduce(np.minimum, "alt"),
+        "max_alt": reduce(np.maximum, "alt"),
+        "mean_power_db": mean("power_db"),
+    })
+    stats.insert(3, "duration", stats["end_time"] - stats["start_time"])
+    return stats
 
 
 def generate_prestats(events: pd.DataFrame,
@@ -18,7 +68,7 @@ def generate_prestats(events: pd.DataFrame,
 
     Parameters:
       events (pd.DataFrame): The DataFrame containing event data with required columns: 'x', 'y', 'z', 
-                             'time_unix', 'reduced_chi2', 'power', and 'power_db'.
+                             'time_unix', 'reduced_chi2', and 'power_db'.
       bucketed_strikes_indices (List[List[int]]): A list of lists where each sublist contains indices of events belonging to a specific bucket.
       bucketed_lightning_correlations (List[List[Tuple[int, int]]]): A list of lists where each sublist contains tuple pairs of indices 
                                                                      corresponding to correlated lightning events used to compute distances and speeds.
@@ -39,42 +89,35 @@ def generate_prestats(events: pd.DataFrame,
 
     overall_prestats = copy.deepcopy(stats_template)
     bucketed_prestats = []
-    for i, strikes_indices in enumerate(bucketed_strikes_indices):
-        prestats = copy.deepcopy(stats_template)
-
-        strike_correlations = bucketed_lightning_correlations[i]
 
-        for correlation in strike_correlations:
-            if max(correlation[0], correlation[1]) >= len(events):
-                continue
-            correlation_sub_df = events.iloc[[correlation[0], correlation[1]]]
+    # Column arrays, read once instead of per row
+    num_events = len(events)
+    xyz = events[['x', 'y', 'z']].to_numpy(dtype=np.float64)
+    time_unix = events['time_unix'].to_numpy(dtype=np.float64)
+    event_columns = {key: events[key].to_numpy() for key in ("reduced_chi2", "power_db")}
+    # Linear power (watts), computed here instead of copying the events with with_power
+    event_columns["power"] = 10 ** (event_columns["power_db"].astype(np.float64) / 10)
 
-            x_values = correlation_sub_df['x'].values
-            y_values = correlation_sub_df['y'].values
-            z_values = correlation_sub_df['z'].values
-            time_unix_values = correlation_sub_df['time_unix'].values
-            
-            distance = math.sqrt((x_values[1]-x_values[0])**2 + (y_values[1]-y_values[0])**2 + (z_values[1]-z_values[0]) ** 2)
-            dt = abs(time_unix_values[1] - time_unix_values[0])
-
-            if dt == 0:
-                dt = 1e-10
+    for i, strikes_indices in enumerate(bucketed_strikes_indices):
+        prestats = copy.deepcopy(stats_template)
 
-            speed = distance/dt
+        correlations = np.asarray(bucketed_lightning_correlations[i], dtype=np.int64).reshape(-1, 2)
+        correlations = correlations[correlations.max(axis=1) < num_events]
 
-            prestats["speed"].append(speed)
-            prestats["distance"].append(distance)
-            overall_prestats["speed"].append(speed)
-            overall_prestats["distance"].append(distance)
+        distances = np.linalg.norm(xyz[correlations[:, 1]] - xyz[correlations[:, 0]], axis=1)
+        dt = np.abs(time_unix[correlations[:, 1]] - time_unix[correlations[:, 0]])
+        dt[dt == 0] = 1e-10
+        speeds = distances / dt
 
-        events_in_bucket = events.iloc[strikes_indices]
+        prestats["speed"] += speeds.tolist()
+        prestats["distance"] += distances.tolist()
+        overall_prestats["speed"] += prestats["speed"]
+        overall_prestats["distance"] += prestats["distance"]
 
-        prestats["reduced_chi2"] += events_in_bucket["reduced_chi2"].values.tolist()
-        prestats["power"] += events_in_bucket["power"].values.tolist()
-        prestats["power_db"] += events_in_bucket["power_db"].values.tolist()
-        overall_prestats["reduced_chi2"] += events_in_bucket["reduced_chi2"].values.tolist()
-        overall_prestats["power"] += events_in_bucket["power"].values.tolist()
-        overall_prestats["power_db"] += events_in_bucket["power_db"].values.tolist()
+        strikes_indices = np.asarray(strikes_indices)
+        for key, values in event_columns.items():
+            prestats[key] += values[strikes_indices].tolist()
+            overall_prestats[key] += prestats[key]
 
         bucketed_prestats.append(prestats)
 
@@ -1,7 +1,74 @@
 import pandas as pd
 import numpy as np
-from typing import Tuple
+from typing import Tuple, Union
 from tqdm import tqdm
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from . import lightning_kernels
+
+# Columns (in order) of the numeric array the bucketer and stitcher operate on
+XYZT_COLUMNS = ["time_unix", "x", "y", "z"]
+
+
+def events_to_xyzt(events: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+    """
+    Project the events onto the columns needed for bucketing and stitching.
+
+    Parameters:
+      events (pd.DataFrame | np.ndarray): DataFrame containing event data, or an already projected array.
+
+    Returns:
+      np.ndarray: C-contiguous float64 array of shape (n, 4) holding the XYZT_COLUMNS ("time_unix", "x", "y", "z").
+    """
+    if isinstance(events, pd.DataFrame):
+        events = events[XYZT_COLUMNS].to_numpy(dtype=np.float64)
+    return np.ascontiguousarray(events, dtype=np.float64)
+
+
+def xyzt_to_kernel_arrays(xyzt: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Gather the given rows of xyzt into the contiguous (t, x, y, z) arrays the compiled kernels take.
+
+    Positions are shifted to their centroid and downcast to float32, which halves the memory traffic of
+    the distance math while keeping centimeter-level precision within a few hundred kilometers of the
+    centroid (distances are unaffected by the shift). Time stays float64, since float32 would only resolve
+    about half a millisecond over a two hour window, which is too coarse for the speed checks.
+
+    Parameters:
+      xyzt (np.ndarray): (n, 4) array from events_to_xyzt.
+      rows (np.ndarray): The rows to gather, in the desired order.
+
+    Returns:
+      Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: t (float64), and x, y, z (float32).
+    """
+    t = np.ascontiguousarray(xyzt[rows, 0])
+    xyz = xyzt[rows, 1:]
+    xyz = (xyz - xyz.mean(axis=0)).astype(np.float32) if len(xyz) else xyz.astype(np.float32)
+    x, y, z = (np.ascontiguousarray(xyz[:, column]) for column in range(3))
+    return t, x, y, z
+
+
+def correlation_components(correlations) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int, np.ndarray]:
+    """
+    Find the connected components of the undirected graph formed by the correlations.
+
+    Parameters:
+      correlations: List of tuples (parent, child) (or an (m, 2) array) representing connections between events.
+
+    Returns:
+      Tuple[np.ndarray, np.ndarray, np.ndarray, int, np.ndarray]: A tuple containing:
+         - nodes: The sorted, unique event indices in the correlations.
+         - edges: (m, 2) array of the correlations, as positions into nodes.
+         - first_seen: Position of the first occurrence of every node in the flattened correlations.
+         - The number of components.
+         - labels: The component of every node.
+    """
+    pairs = np.asarray(correlations, dtype=np.int64).reshape(-1, 2)
+    nodes, first_seen, edges = np.unique(pairs.ravel(), return_index=True, return_inverse=True)
+    edges = edges.reshape(-1, 2)
+    graph = coo_matrix((np.ones(len(edges), dtype=np.int8), (edges[:, 0], edges[:, 1])), shape=(len(nodes), len(nodes)))
+    num_components, labels = connected_components(graph, directed=False)
+    return nodes, edges, first_seen, num_components, labels
 
 
 def filter_correlations_by_chain_size(correlations, min_pts, filter_point_to_self: bool = True):
@@ -9,52 +76,40 @@ def filter_correlations_by_chain_size(correlations, min_pts, filter_point_to_sel
     Filter out correlations that do not belong to a connected chain with at least min_pts nodes.
     
     This function builds an undirected graph where each correlation (parent, child)
-    represents an edge. It then uses depth-first search (DFS) to identify connected
-    components. Only nodes within components that have at least min_pts nodes are considered valid.
+    represents an edge, and finds its connected components (see correlation_components).
+    Only nodes within components that have at least min_pts nodes are considered valid.
     
     Parameters:
       correlations: List of tuples (parent, child) representing connections between events.
       min_pts: Minimum number of nodes required for a chain to be considered valid.
+      filter_point_to_self: Whether to drop correlations from a node to itself.
       
     Returns:
       A list of filtered correlations where both nodes belong to a valid chain.
     """
+    # A chain of min_pts nodes needs at least min_pts - 1 correlations
+    if len(correlations) == 0 or len(correlations) < min_pts - 1:
+        return []
+
+    nodes, edges, _, _, labels = correlation_components(correlations)
+    valid_nodes = np.bincount(labels)[labels] >= min_pts
 
-    # Build an undirected graph from the correlations.
-    graph = {}
-    for parent, child in correlations:
-        graph.setdefault(parent, set()).add(child)
-        graph.setdefault(child, set()).add(parent)
-    
-    visited = set()
-    valid_nodes = set()
-    
-    # Use DFS to find connected components.
-    for node in graph:
-        if node not in visited:
-            stack = [node]
-            component = set()
-            while stack:
-                current = stack.pop()
-                if current not in component:
-                    component.add(current)
-                    stack.extend(graph.get(current, []))
-            visited |= component
-            if len(component) >= min_pts:
-                valid_nodes |= component
-    
     # Filter correlations: both parent and child must be in a valid chain.
-    return [(p, c) for (p, c) in correlations if p in valid_nodes and c in valid_nodes and (filter_point_to_self and p != c)]
+    keep = valid_nodes[edges[:, 0]] & valid_nodes[edges[:, 1]]
+    if filter_point_to_self:
+        keep &= edges[:, 0] != edges[:, 1]
+    return list(map(tuple, nodes[edges[keep]].tolist()))
 
 
-def stitch_lightning_strike(strike_indeces: list[int], events: pd.DataFrame, params: dict) -> list[Tuple[(int, int)]]:
+def stitch_lightning_strike(strike_indeces: list[int], events: Union[pd.DataFrame, np.ndarray], params: dict) -> list[Tuple[(int, int)]]:
     """
     Build a chain of lightning strike nodes by connecting each strike to the closest preceding strike,
     subject to thresholds on time difference, spatial distance, and speed.
     
     Parameters:
       strike_indeces (list[int]): List of indices corresponding to lightning strike events.
-      events (pd.DataFrame): DataFrame containing event data with columns such as "time_unix", "x", "y", and "z".
+      events (pd.DataFrame | np.ndarray): DataFrame containing event data with columns "time_unix", "x", "y", and "z",
+          or the equivalent (n, 4) array from events_to_xyzt.
       params (dict): Additional filtering parameters including:
           - max_lightning_time_threshold (float): Maximum allowed time difference between consecutive points (default: 1 second).
           - max_lightning_dist (float): Maximum allowed distance between consecutive points (default: 50000 meters).
@@ -72,80 +127,29 @@ def stitch_lightning_strike(strike_indeces: list[int], events: pd.DataFrame, par
     min_speed = params.get("min_lightning_speed", 0)
     min_pts = params.get("min_lightning_points", 300)
 
+    # Too few points to ever form a chain of min_pts points
+    if len(strike_indeces) < min_pts:
+        return []
 
-    # Sort the strike indices chronologically (using "time_unix").
-    strike_indeces: list[int] = sorted(strike_indeces, key=lambda idx: events.loc[idx, "time_unix"])
-    
-
-    # Create a Series DataFrame for only the selected strikes.
-    strike_series_df: pd.DataFrame = events.iloc[strike_indeces]
-
-    # Cache the cupy arrays for the data columns.
-    all_x = np.array(strike_series_df["x"].values)
-    all_y = np.array(strike_series_df["y"].values)
-    all_z = np.array(strike_series_df["z"].values)
-    all_times = np.array(strike_series_df["time_unix"].values)
-
-    # List to store nodes corresponding to each strike.
-    parsed_indices: list[int] = []
-    correlations: list[Tuple[(int, int)]] = []
-
-    for i in range(len(strike_indeces)):
-        current_indice = strike_indeces[i]
-
-        if len(parsed_indices) > 0:
-            # Get the current strike's coordinates and time.
-            x1, y1, z1 = all_x[i], all_y[i], all_z[i]
-            current_time = all_times[i]
+    xyzt = events_to_xyzt(events)
 
-            x_pre = all_x[:i]
-            y_pre = all_y[:i]
-            z_pre = all_z[:i]
-            times_pre = all_times[:i]
-            current_coords = np.array([x1, y1, z1])
-
-            # Compute squared Euclidean distances.
-            # We don't sqrt for optimization purposes.
-            # We just do our math in squareds
-            dx = x_pre - current_coords[0]
-            dy = y_pre - current_coords[1]
-            dz = z_pre - current_coords[2]
-            distances_squared = dx * dx + dy * dy + dz * dz
-
-            # Compute time differences (seconds).
-            dt = current_time - times_pre
-
-            dt_squared = (dt * dt)
-            dt_squared = np.where(dt_squared == 0, 1e-10, dt_squared)
-
-            # Compute squared speeds (m²/s²).
-            speeds_squared = distances_squared / dt_squared
-
-            # Precompute squared thresholds.
-            max_dist_squared = max_dist_between_pts ** 2
-            max_speed_squared = max_speed ** 2
-            min_speed_squared = min_speed ** 2
-            max_time_threshold_squared = max_time_threshold ** 2
-
-            # Apply filtering mask using squared comparisons.
-            mask = (distances_squared <= max_dist_squared)
-            mask &= (speeds_squared <= max_speed_squared) 
-            mask &= (speeds_squared >= min_speed_squared)
-            mask &= (dt_squared <= max_time_threshold_squared)
-
-            valid_indices = np.where(mask)[0]
-
-            if valid_indices.size > 0:
-                # Select the candidate with the minimum distance among those valid.
-                valid_distances_squared = distances_squared[valid_indices]
-                min_valid_idx = int(np.argmin(valid_distances_squared))
-                candidate_idx = int(valid_indices[min_valid_idx])
-                parent_indice = parsed_indices[candidate_idx]
-
-                correlations.append((parent_indice, current_indice))
-
-        # Save the current node.
-        parsed_indices.append(current_indice)
+    # Sort the strike indices chronologically (using "time_unix").
+    strike_indeces = np.asarray(strike_indeces)
+    strike_indeces = strike_indeces[np.argsort(xyzt[strike_indeces, 0], kind="stable")]
+
+    # Cache the arrays for the data columns of only the selected strikes.
+    all_times, all_x, all_y, all_z = xyzt_to_kernel_arrays(xyzt, strike_indeces)
+
+    # Connect every point to the closest valid preceding point. Only the points within
+    # max_time_threshold are candidates, so the kernel scans that time window instead of all pairs.
+    parents = lightning_kernels.stitch_kernel(all_times, all_x, all_y, all_z,
+                                              float(max_dist_between_pts), float(max_speed),
+                                              float(min_speed), float(max_time_threshold))
+    children = np.nonzero(parents >= 0)[0]
+    if len(children) < min_pts - 1:
+        return []
+    correlations: list[Tuple[(int, int)]] = list(zip(strike_indeces[parents[children]].tolist(),
+                                                     strike_indeces[children].tolist()))
 
     # Filter out correlations that are not connected to a lightning strike that contains min_pts pts
     correlations_filtered = filter_correlations_by_chain_size(correlations, min_pts, filter_point_to_self=True)
@@ -153,7 +157,7 @@ def stitch_lightning_strike(strike_indeces: list[int], events: pd.DataFrame, par
     return correlations_filtered
 
 
-def stitch_lightning_strikes(bucketed_strike_indices: list[list[int]], events: pd.DataFrame, params: dict) -> list[list[Tuple[int, int]]]:
+def stitch_lightning_strikes(bucketed_strike_indices: list[list[int]], events: Union[pd.DataFrame, np.ndarray], params: dict) -> list[list[Tuple[int, int]]]:
     """
     Process multiple groups of lightning strike indices and generate correlations for each group.
     
@@ -163,7 +167,7 @@ def stitch_lightning_strikes(bucketed_strike_indices: list[list[int]], events: p
     
     Parameters:
       bucketed_strike_indices (list[list[int]]): A list where each element is a list of strike event indices representing a group.
-      events (pandas.DataFrame): DataFrame containing event data.
+      events (pandas.DataFrame | np.ndarray): DataFrame containing event data, or the (n, 4) array from events_to_xyzt.
       params (dict): Additional parameters passed to stitch_lightning_strike and for combining groups, including:
           - combine_strikes_with_intercepting_times (bool): Whether to merge groups with intercepting time windows (default: True).
           - intercepting_times_extension_buffer (float): Extra time buffer (in seconds) added when checking intercepting groups (default: 10).
@@ -174,10 +178,12 @@ def stitch_lightning_strikes(bucketed_strike_indices: list[list[int]], events: p
       A list (one element per input group) where each element is a list of tuples (parent_index, child_index)
       representing correlations between lightning strike events.
     """
+    xyzt = events_to_xyzt(events)
+
     # First, compute correlations for each strike group.
     bucketed_correlations = []
     for strike_indices in tqdm(bucketed_strike_indices, desc="Stitching Lightning Strikes", total=len(bucketed_strike_indices)):
-        correlations = stitch_lightning_strike(strike_indices, events, params)
+        correlations = stitch_lightning_strike(strike_indices, xyzt, params)
         bucketed_correlations.append(correlations)
 
     return bucketed_correlations
@@ -59,8 +59,13 @@ from shapely.geometry import box
 from tqdm import tqdm
 import re
 import os
+import pickle
+import functools
+import hashlib
 import multiprocessing
 from . import toolbox
+from . import lightning_statistics
+from . import database_parser
 from matplotlib.figure import Figure
 from matplotlib.colorbar import Colorbar
 from collections.abc import Callable
@@ -148,6 +153,7 @@ global_shutdown_event = None
 def init_worker(shutdown_ev):
     global global_shutdown_event
     global_shutdown_event = shutdown_ev
+    toolbox.pin_worker_threads()
 
 def colormap_to_hex(cmap_name: str) -> List[str]:
     """
@@ -320,7 +326,8 @@ class XLMAParams:
             additional_overlap_right: int = 0,
             additional_overlap_up: int = 0,
             additional_overlap_down: int = 0,
-            twod_overlay_function: Callable[[RangeParams], List[Overlay]] = None):
+            twod_overlay_function: Callable[[RangeParams], List[Overlay]] = None,
+            shapefile_cache_dir: str = None):
             
         """
         Initialize the XLMAParams instance with visualization parameters.
@@ -373,6 +380,9 @@ class XLMAParams:
                 that will be drawn on top of the visualization. This allows integration of 
                 external spatial features (e.g., geographic polygons, sensor ranges, or 
                 altitude-constrained annotations) that align with the specified 3D bounding box.
+            shapefile_cache_dir (str): Directory where the parsed cartopy_paths shapefiles are cached between runs.
+                If None, the shapefiles are only cached within the process. The config_and_parser exports
+                default it to a folder in the cache directory.
         """
 
         self.time_as_datetime = time_as_datetime
@@ -414,6 +424,7 @@ class XLMAParams:
         self.additional_overlap_up = additional_overlap_up
         self.additional_overlap_down = additional_overlap_down
         self.twod_overlay_function = twod_overlay_function
+        self.shapefile_cache_dir = shapefile_cache_dir
         
         # Default headers
         self.headers = {
@@ -427,6 +438,7 @@ class XLMAParams:
             'reduced_chi2': 'Reduced Chi^2',
             'num_stations': 'Number of Stations',
             'power': 'Power (W)',
+            'mask_int': 'Station Bitmask',
             'mask': 'Hexidecimal Bitmask',
             'stations': 'Stations Contributed',
             'x': 'Meters (ECEF X WGS84)',
@@ -440,6 +452,48 @@ class XLMAParams:
             for key, value in headers:
                 self.headers[key] = value
 
+@functools.lru_cache(maxsize=None)
+def _read_shapefile(path: str, cache_dir: Optional[str] = None) -> gpd.GeoDataFrame:
+    """
+    Read a shapefile (e.g. the county boundaries) once per process.
+
+    With a cache_dir, the parsed GeoDataFrame is also pickled there, keyed by the shapefile's path,
+    modification time and size, and reused by later runs until the shapefile changes. The pickle is
+    written to a temporary file and renamed into place, so concurrent workers never read a partially
+    written file.
+
+    Parameters:
+      path (str): Path to the shapefile.
+      cache_dir (str, optional): Directory holding the pickled shapefiles. Defaults to None (no pickle).
+
+    Returns:
+      gpd.GeoDataFrame: The shapes in the file.
+    """
+    if cache_dir is None:
+        return gpd.read_file(path)
+
+    stat = os.stat(path)
+    key = hashlib.blake2b(f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}".encode(), digest_size=16).hexdigest()
+    pickle_path = os.path.join(cache_dir, f"{key}.gdf.pkl")
+    if os.path.isfile(pickle_path):
+        try:
+            with open(pickle_path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            pass  # Unreadable pickle, re-read the shapefile
+
+    shapes = gpd.read_file(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f"{pickle_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(shapes, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, pickle_path)
+    except OSError:
+        pass  # Unwritable cache directory, the in-process cache still applies
+    return shapes
+
+
 def _figure_to_rgba_array(fig: Figure, dpi: int = 300) -> np.ndarray:
     buf = io.BytesIO()
     fig.savefig(buf, format="png", dpi=dpi, transparent=True, bbox_inches="tight", pad_inches=0)
@@ -478,7 +532,13 @@ def create_strike_image(xlma_params: XLMAParams,
     plt.clf()
     plt.close()
     df = events.iloc[strike_indeces].copy(deep=True)
-    all_x_arr, all_y_arr, all_alt_arr = events[xlma_params.x_unit], events[xlma_params.y_unit], events[xlma_params.alt_unit]
+    if xlma_params.color_unit == "power":
+        df = database_parser.with_power(df)
+    all_x_arr = events[xlma_params.x_unit].to_numpy()
+    all_y_arr = events[xlma_params.y_unit].to_numpy()
+    all_alt_arr = events[xlma_params.alt_unit].to_numpy()
+    if strike_stitchings:
+        stitch_pairs = np.asarray(strike_stitchings, dtype=np.int64).reshape(-1, 2)
 
     start_time_unit = df.iloc[0][xlma_params.time_unit]
     start_time = datetime.datetime.fromtimestamp(timestamp=start_time_unit, tz=datetime.timezone.utc)
@@ -620,26 +680,16 @@ def create_strike_image(xlma_params: XLMAParams,
     # Alt and Num Pts Plot
     ######################################################################
     # Alt and Num Pts Plot using LineCollection
-    altitudes = {}
-    color_units = {}
-    for _, row in df.iterrows():
-        altitude_group = xlma_params.altitude_group_size * (row[xlma_params.alt_unit] // xlma_params.altitude_group_size)
-        if altitude_group not in altitudes:
-            altitudes[altitude_group] = 0
-            color_units[altitude_group] = []
-        altitudes[altitude_group] += 1
-        color_units[altitude_group].append(row[color_unit_specific])
+    altitude_groups = xlma_params.altitude_group_size * (df[xlma_params.alt_unit].to_numpy() // xlma_params.altitude_group_size)
+    unique_altitude_groups, altitude_group_inverse = np.unique(altitude_groups, return_inverse=True)
+    altitude_group_counts = np.bincount(altitude_group_inverse, minlength=len(unique_altitude_groups))
+    altitude_group_color_sums = np.bincount(altitude_group_inverse, weights=df[color_unit_specific].to_numpy(dtype=np.float64), minlength=len(unique_altitude_groups))
 
     alt_dict = {
-        xlma_params.alt_group_unit: [],
-        xlma_params.num_pts_unit: []
+        xlma_params.alt_group_unit: unique_altitude_groups.tolist(),
+        xlma_params.num_pts_unit: altitude_group_counts.tolist()
     }
-    alt_dict[color_unit_specific] = []
-
-    for altitude_group, num_pts in sorted(altitudes.items()):
-        alt_dict[xlma_params.alt_group_unit].append(altitude_group)
-        alt_dict[xlma_params.num_pts_unit].append(num_pts)
-        alt_dict[color_unit_specific].append(np.mean(color_units[altitude_group]))
+    alt_dict[color_unit_specific] = (altitude_group_color_sums / altitude_group_counts).tolist()
 
     alt_df = pd.DataFrame(alt_dict)
     range_params.num_pts_range = range_params.num_pts_range or range_bufferize(alt_df[xlma_params.num_pts_unit], xlma_params.buffer_extension)
@@ -703,13 +753,8 @@ def create_strike_image(xlma_params: XLMAParams,
     ax3.imshow(X=img.to_pil(), extent=extent, origin='upper', zorder=4)
 
     if strike_stitchings:
-        segments = []
-        for stitch in strike_stitchings:
-            i1, i2 = stitch
-            # Safely retrieve the coordinates from the DataFrame using iloc
-            point1 = [all_x_arr[i1], all_y_arr[i1]]
-            point2 = [all_x_arr[i2], all_y_arr[i2]]
-            segments.append([point1, point2])
+        # (num_stitchings, 2 points, 2 coordinates) array of line segments
+        segments = np.stack([all_x_arr[stitch_pairs], all_y_arr[stitch_pairs]], axis=-1)
 
         # Create a LineCollection for efficiency with many segments.
         lc = LineCollection(segments, colors=marker_color, linewidths=xlma_params.stitching_line_thickness, alpha=xlma_params.stitching_alpha)
@@ -718,12 +763,12 @@ def create_strike_image(xlma_params: XLMAParams,
 
     if xlma_params.cartopy_paths:
         for path in xlma_params.cartopy_paths:
-            counties = gpd.read_file(path)
+            counties = _read_shapefile(path, getattr(xlma_params, "shapefile_cache_dir", None))
 
             bounding_box = box(range_params.x_range[0], range_params.y_range[0], range_params.x_range[1], range_params.y_range[1])  # Example: part of South Texas
 
-            # Filter counties that intersect with bounding box
-            counties_in_box = counties[counties.geometry.intersects(bounding_box)]
+            # Filter counties that intersect with bounding box (through the spatial index)
+            counties_in_box = counties.iloc[np.sort(counties.sindex.query(bounding_box, predicate="intersects"))]
 
             if len(counties_in_box) == 0:
                 continue
@@ -776,13 +821,8 @@ def create_strike_image(xlma_params: XLMAParams,
     ax4.imshow(X=img.to_pil(), extent=extent, origin='upper', zorder=3)
 
     if strike_stitchings:
-        segments = []
-        for stitch in strike_stitchings:
-            i1, i2 = stitch
-            # Safely retrieve the coordinates from the DataFrame using iloc
-            point1 = [all_alt_arr[i1], all_y_arr[i1]]
-            point2 = [all_alt_arr[i2], all_y_arr[i2]]
-            segments.append([point1, point2])
+        # (num_stitchings, 2 points, 2 coordinates) array of line segments
+        segments = np.stack([all_alt_arr[stitch_pairs], all_y_arr[stitch_pairs]], axis=-1)
 
         # Create a LineCollection for efficiency with many segments.
         lc = LineCollection(segments, colors=marker_color, linewidths=xlma_params.stitching_line_thickness, alpha=xlma_params.stitching_alpha)
@@ -809,13 +849,8 @@ def create_strike_image(xlma_params: XLMAParams,
     ax1.imshow(X=img.to_pil(), extent=extent, origin='upper', zorder=3)
 
     if strike_stitchings:
-        segments = []
-        for stitch in strike_stitchings:
-            i1, i2 = stitch
-            # Safely retrieve the coordinates from the DataFrame using iloc
-            point1 = [all_x_arr[i1], all_alt_arr[i1]]
-            point2 = [all_x_arr[i2], all_alt_arr[i2]]
-            segments.append([point1, point2])
+        # (num_stitchings, 2 points, 2 coordinates) array of line segments
+        segments = np.stack([all_x_arr[stitch_pairs], all_alt_arr[stitch_pairs]], axis=-1)
 
         # Create a LineCollection for efficiency with many segments.
         lc = LineCollection(segments, colors=marker_color, linewidths=xlma_params.stitching_line_thickness, alpha=xlma_params.stitching_alpha)
@@ -1004,6 +1039,8 @@ def create_strike_image_preview(xlma_params: XLMAParams,
     """
     # Select the events to preview.
     df = events.iloc[strike_indeces].copy(deep=True)
+    if xlma_params.color_unit == "power":
+        df = database_parser.with_power(df)
     
     # Compute x and y ranges if not provided.
     if range_params is None:
@@ -1054,13 +1091,14 @@ def _create_strike_gif_utility(args_list):
         total_events, frame, num_frames, strike_indeces, strike_stitchings, xlma_params, events, range_params, min_time, max_time = args
 
         frame_time_cutoff = min_time + (frame / num_frames) * (max_time - min_time)
-        partial_indices = [i for i in strike_indeces if events.iloc[i][xlma_params.time_unit] <= frame_time_cutoff]
+        strike_indeces = np.asarray(strike_indeces)
+        partial_indices = strike_indeces[events[xlma_params.time_unit].to_numpy()[strike_indeces] <= frame_time_cutoff]
 
         # If strike_stitchings is provided, filter for those with both endpoints within the current cutoff.
         if strike_stitchings is not None:
-            partial_stitchings = [
-                (i1, i2) for (i1, i2) in strike_stitchings if i1 in partial_indices and i2 in partial_indices
-            ]
+            stitch_pairs = np.asarray(strike_stitchings, dtype=np.int64).reshape(-1, 2)
+            in_frame = np.isin(stitch_pairs, partial_indices).all(axis=1)
+            partial_stitchings = list(map(tuple, stitch_pairs[in_frame].tolist()))
         else:
             partial_stitchings = None
 
@@ -1208,21 +1246,12 @@ def export_stats(xlma_params: XLMAParams, events: pd.DataFrame, bucketed_indeces
     else:
         plt.style.use(style='default')
 
-    # Convert the time column to UTC datetime format if necessary.
-
-    times = pd.to_datetime(events[xlma_params.time_unit], unit='s', utc=True)
-
-    agg_times = []
-    num_pts = []
+    # Representative (mean) time and number of events of every non-empty bucket, computed for all buckets at once.
+    strike_stats = lightning_statistics.compute_strike_stats(events, bucketed_indeces, time_column=xlma_params.time_unit)
+    strike_stats = strike_stats[strike_stats["num_pts"] > 0]  # Skip empty buckets
 
-    # Iterate over each bucket, computing the representative (mean) time and the number of events.
-    for bucket in bucketed_indeces:
-        if not bucket:  # Skip empty buckets
-            continue
-        bucket_times = times.iloc[bucket]
-        rep_time = bucket_times.mean()
-        agg_times.append(rep_time)
-        num_pts.append(len(bucket))
+    agg_times = pd.to_datetime(strike_stats["mean_time"], unit='s', utc=True).tolist()
+    num_pts = strike_stats["num_pts"].tolist()
 
 
     # Choose the line color based on the theme.
@@ -1281,16 +1310,35 @@ def export_stats(xlma_params: XLMAParams, events: pd.DataFrame, bucketed_indeces
     plt.clf()
     plt.close()
 
+def _strike_subset(events: pd.DataFrame, strike_indeces: List[int], strike_correlations: Optional[List[Tuple[int, int]]]):
+    """
+    Cut the rows of one strike out of the events, so only those rows have to be sent to a worker.
+
+    Returns:
+      Tuple[pd.DataFrame, Optional[List[Tuple[int, int]]]]: The strike's events (re-indexed from 0, in the order of
+      strike_indeces), and its correlations remapped to positions in that DataFrame.
+    """
+    strike_indeces = np.asarray(strike_indeces)
+    strike_events = events.iloc[strike_indeces].reset_index(drop=True)
+
+    if strike_correlations is not None:
+        sorter = np.argsort(strike_indeces, kind="stable")
+        pairs = np.asarray(strike_correlations, dtype=np.int64).reshape(-1, 2)
+        local_pairs = sorter[np.searchsorted(strike_indeces, pairs, sorter=sorter)]
+        strike_correlations = list(map(tuple, local_pairs.tolist()))
+
+    return strike_events, strike_correlations
+
 def _export_bulk_to_folder(args):
-    events, times, output_dir, xlma_params, bucketed_strike_indices, bucketed_strike_correlations = args
+    output_dir, xlma_params, strikes = args
     if global_shutdown_event and global_shutdown_event.is_set():
             return
     
-    for i, strike_indeces in enumerate(bucketed_strike_indices):
+    for strike_events, strike_correlations in strikes:
         if global_shutdown_event and global_shutdown_event.is_set():
             break
 
-        start_time_unix = times[strike_indeces[0]]
+        start_time_unix = strike_events['time_unix'].iat[0]
         start_time_dt = datetime.datetime.fromtimestamp(
             start_time_unix, tz=datetime.timezone.utc
         ).strftime("%Y-%m-%d %H:%M:%S UTC")
@@ -1299,41 +1347,31 @@ def _export_bulk_to_folder(args):
 
         file_out_path = os.path.join(output_dir, safe_start_time) + ".tiff"
 
-        if bucketed_strike_correlations and len(bucketed_strike_correlations) > 0:
-            strike_correlations = bucketed_strike_correlations[i]
-        else:
-            strike_correlations = None
-
-        strike_image, _ = create_strike_image(xlma_params=xlma_params, events=events, strike_indeces=strike_indeces, strike_stitchings=strike_correlations)
+        strike_image, _ = create_strike_image(xlma_params=xlma_params, events=strike_events, strike_indeces=np.arange(len(strike_events)), strike_stitchings=strike_correlations)
         export_strike_image(strike_image, file_out_path)
 
 def export_bulk_to_folder(events: pd.DataFrame, output_dir: str, bucketed_strike_indices: List[List[int]], bucketed_strike_correlations: List[Tuple[int, int]] = None, num_cores:int = 1, num_workers: int = 25, xlma_params:XLMAParams = XLMAParams()):
-    times = events['time_unix']
     shutdown_event = multiprocessing.Event()
 
-    bucketed_bucketed_strike_indices = toolbox.split_into_groups(bucketed_strike_indices, num_workers)
+    strike_numbers = toolbox.split_into_groups(list(range(len(bucketed_strike_indices))), num_workers)
 
-    if bucketed_strike_correlations:
-        bucketed_bucketed_strike_correlations = toolbox.split_into_groups(bucketed_strike_correlations, num_workers)
-    else:
-        bucketed_bucketed_strike_correlations = [None] * len(bucketed_bucketed_strike_indices)
+    def get_strike(i):
+        strike_correlations = bucketed_strike_correlations[i] if bucketed_strike_correlations else None
+        return _strike_subset(events, bucketed_strike_indices[i], strike_correlations)
 
-    lightning_groups = []
-    for i, sub_bucketed_strike_indices in enumerate(bucketed_bucketed_strike_indices):
-        lightning_groups.append((sub_bucketed_strike_indices, bucketed_bucketed_strike_correlations[i]))
-        
-    args_list = [
-        (events, times, output_dir, xlma_params, bucketed_strike_i, bucketed_strike_corr)
-        for bucketed_strike_i, bucketed_strike_corr in lightning_groups
-    ]
+    # Each task only carries the rows of its own strikes, instead of the whole events DataFrame
+    args_list = (
+        (output_dir, xlma_params, [get_strike(i) for i in group])
+        for group in strike_numbers
+    )
 
     try:
         if num_cores > 1:
             with multiprocessing.Pool(processes=num_cores, initializer=init_worker, initargs=(shutdown_event,)) as pool:
-                for _ in tqdm(pool.imap(_export_bulk_to_folder, args_list), total=len(args_list), desc="Exporting Strikes"):
+                for _ in tqdm(pool.imap(_export_bulk_to_folder, args_list), total=len(strike_numbers), desc="Exporting Strikes"):
                     pass
         else: #Only use one core, in-line
-            for args in tqdm(args_list, desc="Exporting Strikes"):
+            for args in tqdm(args_list, total=len(strike_numbers), desc="Exporting Strikes"):
                 _export_bulk_to_folder(args)
     except KeyboardInterrupt:
         shutdown_event.set()
@@ -5,6 +5,7 @@ from typing import List, Mapping, Any
 import datetime
 import string
 import zipfile
+import shutil
 import re
 
 def tprint(*args: Any, **kwargs: Any) -> None:
@@ -260,6 +261,39 @@ def cpu_pct_to_cores(pct: float) -> int:
     return int(max(pct * os.cpu_count(), 1))
 
 
+# Environment variables that size the thread pools of the numerical libraries (OpenMP, MKL, OpenBLAS, ...)
+THREAD_LIMIT_ENV_VARS = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS", "VECLIB_MAXIMUM_THREADS"]
+
+def pin_worker_threads(num_threads: int = 1) -> None:
+    """
+    Limits the native thread pools of a worker process to `num_threads` threads.
+
+    Worker pools already use one process per core, so if every worker also starts a BLAS/OpenMP
+    thread pool of its own, the machine runs up to cores^2 threads that fight over the caches. Use this
+    as the initializer of process pools. The environment variables are picked up by libraries loaded
+    after the call (and by child processes); pools that are already running are limited through
+    threadpoolctl, if it is installed.
+
+    Parameters:
+        num_threads (int): Number of threads per native thread pool. Defaults to 1.
+
+    Returns:
+        None
+
+    Example:
+        >>> with concurrent.futures.ProcessPoolExecutor(initializer=pin_worker_threads) as executor:
+        ...     pass
+    """
+    for env_var in THREAD_LIMIT_ENV_VARS:
+        os.environ[env_var] = str(num_threads)
+
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(limits=num_threads)
+
+
 def lerp(start: float, end: float, t: float) -> float:
     """
     Computes the linear interpolation between two float values.
@@ -368,7 +402,9 @@ def unzip_file(zip_path: str):
     Extracts a zip file to a directory with the same base name as the zip file.
 
     Validates that the provided path refers to a valid zip file and then extracts its contents
-    to a new directory named after the zip file (with the ".zip" extension removed).
+    to a new directory named after the zip file (with the ".zip" extension removed). The contents are
+    extracted to a temporary directory first and renamed into place, so a partially extracted directory
+    is never picked up (e.g. by another process running at the same time).
 
     Parameters:
         zip_path (str): The full path of the zip file to be extracted.
@@ -387,9 +423,16 @@ def unzip_file(zip_path: str):
         raise ValueError(f"Not a valid zip file: {zip_path}")
     
     extract_dir = os.path.splitext(zip_path)[0]  # Remove .zip extension
+    temp_dir = f"{extract_dir}.{os.getpid()}.tmp"
     
     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        zip_ref.extractall(extract_dir)
+        zip_ref.extractall(temp_dir)
+
+    try:
+        os.rename(temp_dir, extract_dir)
+    except OSError:
+        # Already extracted by someone else
+        shutil.rmtree(temp_dir, ignore_errors=True)
     
     return extract_dir
 
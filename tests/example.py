@@ -22,6 +22,13 @@ lightning strike is simply a list of indices for the "events" DataFrame
 the data. Examples in the code and comments below show how to do so.
 """
 ####################################################################################
+import os
+
+# One thread per native (BLAS/OpenMP) thread pool. The work is spread over processes instead,
+# and this has to be set before numpy is imported to take effect.
+for env_var in ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]:
+    os.environ.setdefault(env_var, "1")
+
 print("Starting up. Importing...")
 import lightning_parser_lib.config_and_parser as config_and_parser
 from lightning_parser_lib.number_crunchers.toolbox import tprint
@@ -29,6 +36,8 @@ import lightning_parser_lib.number_crunchers.toolbox as toolbox
 from lightning_parser_lib.number_crunchers.lightning_visualization import XLMAParams
 import time
 import datetime
+import concurrent.futures
+import copy
 import pandas as pd
 
 # what percent of the total number of cores to be utilized. 
@@ -41,12 +50,14 @@ lightning_configuration = config_and_parser.LightningConfig(
     data_extension = ".dat",
     cache_dir ="cache_dir",
     csv_dir = "strikes_csv_files",
+    parquet_dir = "strikes_parquet",
     export_dir = "export",
     strike_dir = "strikes",
     strike_stitchings_dir = "strike_stitchings"
 )
 
 EXPORT_AS_CSV = True 
+EXPORT_AS_PARQUET = True
 EXPORT_GENERAL_STATS = True
 EXPORT_ALL_STRIKES = False
 EXPORT_ALL_STRIKES_STITCHINGS = False
@@ -63,13 +74,14 @@ def main():
     # 'reduced_chi2' -> float   Reduced chi-square goodness-of-fit metric
     # 'num_stations' -> int     Count (Number of contributing stations)
     # 'power_db'     -> float   Decibels (dBW) (Power of the detected event in decibel-watts)
-    # 'power'        -> float   Watts (Linear power, converted from power_db using 10^(power_db / 10))
-    # 'mask'         -> str     Hexadecimal bitmask (Indicates contributing stations)
-    # 'stations'     -> str     Comma-separated string (Decoded station names from the mask)
+    #                           (Linear power in Watts is not stored; add it with number_crunchers.with_power(events))
+    # 'mask_int'     -> uint32  Bitmask (Indicates contributing stations)
+    #                           (The hexadecimal mask and station names are not stored; add them with
+    #                            number_crunchers.with_stations(events, db_path). CSV/Parquet exports include them)
     # 'x'            -> float   Meters (ECEF X-coordinate in WGS84)
     # 'y'            -> float   Meters (ECEF Y-coordinate in WGS84)
     # 'z'            -> float   Meters (ECEF Z-coordinate in WGS84)
-    # `file_name`    -> str     The name of the file used that contains the point information
+    # `file_name`    -> category The name of the file used that contains the point information
 
     # Mark process start time
     process_start_time = time.time()
@@ -141,9 +153,6 @@ def main():
     MAX_N_PTS = 1000
     bucketed_strikes_indices, bucketed_lightning_correlations = config_and_parser.limit_to_n_points(bucketed_strikes_indices, bucketed_lightning_correlations, MAX_N_PTS)
 
-    if EXPORT_AS_CSV:
-        config_and_parser.export_as_csv(bucketed_strikes_indices, events, config=lightning_configuration) 
-
     # Add a zipped file for counties into the project
     # and it will automatically unzip and locate, so long as it follows formatting `tl_XXXX_us_county.zip` (i.e. `tl_2024_us_county.zip``)
     # https://www2.census.gov/geo/tiger/TIGER2024/COUNTY/
@@ -154,14 +163,40 @@ def main():
         cartopy_paths= toolbox.append_county([])
     )
 
+    # The exports read the same inputs but write to separate directories,
+    # so they are run side by side in their own processes.
+    # Each entry is (function, args, kwargs, whether the export runs its own pool of num_cores processes)
+    exports = []
+
+    if EXPORT_AS_CSV:
+        exports.append((config_and_parser.export_as_csv, (bucketed_strikes_indices, events), {}, False))
+
+    if EXPORT_AS_PARQUET:
+        exports.append((config_and_parser.export_as_parquet, (bucketed_strikes_indices, events), {}, False))
+
     if EXPORT_GENERAL_STATS:
-        config_and_parser.export_general_stats(bucketed_strikes_indices, bucketed_lightning_correlations, events, config=lightning_configuration, xlma_params=xlma_params)
+        exports.append((config_and_parser.export_general_stats, (bucketed_strikes_indices, bucketed_lightning_correlations, events), {"xlma_params": xlma_params}, True))
 
     if EXPORT_ALL_STRIKES:
-        config_and_parser.export_all_strikes(bucketed_strikes_indices, events, config=lightning_configuration, xlma_params=xlma_params)
+        exports.append((config_and_parser.export_all_strikes, (bucketed_strikes_indices, events), {"xlma_params": xlma_params}, True))
 
     if EXPORT_ALL_STRIKES_STITCHINGS:
-        config_and_parser.export_strike_stitchings(bucketed_lightning_correlations, events, config=lightning_configuration, xlma_params=xlma_params)
+        exports.append((config_and_parser.export_strike_stitchings, (bucketed_lightning_correlations, events), {"xlma_params": xlma_params}, True))
+
+    # Share the cores among the exports that run their own pools, so the processes
+    # (one pinned thread each) add up to about num_cores instead of a multiple of it
+    num_pool_exports = sum(1 for *_, uses_pool in exports if uses_pool)
+    pool_configuration = copy.copy(lightning_configuration)
+    pool_configuration.num_cores = max(1, lightning_configuration.num_cores // max(1, num_pool_exports))
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(1, len(exports)), initializer=toolbox.pin_worker_threads) as executor:
+        export_jobs = [
+            executor.submit(function, *args, config=pool_configuration if uses_pool else lightning_configuration, **kwargs)
+            for function, args, kwargs, uses_pool in exports
+        ]
+
+        for export_job in concurrent.futures.as_completed(export_jobs):
+            export_job.result() # Raises if the export failed
 
     tprint("Finished generating plots")
 